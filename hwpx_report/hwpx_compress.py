@@ -1,6 +1,13 @@
 import zipfile
 from pathlib import Path
 
+# 이미 압축된 이미지는 다시 DEFLATE 해도 거의 줄지 않으므로 STORED로 넣는다
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif"}
+
+
+def compress_type_for(path: Path) -> int:
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
 
 def create_hwpx_from_folder(folder_path: str, output_path: str):
     """폴더를 HWPX 파일로 압축"""
@@ -21,7 +28,7 @@ def create_hwpx_from_folder(folder_path: str, output_path: str):
         for file_path in sorted(folder.rglob('*')):
             if file_path.is_file() and file_path.name != 'mimetype':
                 arcname = file_path.relative_to(folder)
-                zipf.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
+                zipf.write(file_path, arcname, compress_type=compress_type_for(file_path))
                 
                 if file_path.suffix == '.xml':
                     print(f"    ✓ {arcname} (DEFLATED)")
@@ -0,0 +1,127 @@
+# image_export.py
+import io
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+NS = {"hp": "http://www.hancom.co.kr/hwpml/2011/paragraph"}
+
+HWPUNIT_PER_INCH = 7200      # HWPUNIT: 1/7200 inch
+EXPORT_DPI = 220             # 인쇄해도 깨지지 않는 해상도
+PNG_COLORS = 256             # 팔레트 양자화 색 수
+JPEG_QUALITY = 90
+DEFAULT_PIC_SIZE = (23280, 13680)  # jbnu_note.xml 의 그림 자리 크기 (HWPUNIT)
+
+
+def pic_placement_size(note_path: str = "hwpx_report/jbnu_note.xml") -> Tuple[int, int]:
+    """
+    양식 XML의 첫 번째 <hp:pic> 자리 크기 (hp:sz width/height, HWPUNIT).
+    찾지 못하면 DEFAULT_PIC_SIZE.
+    """
+    try:
+        root = ET.parse(note_path).getroot()
+        sz = root.find(".//hp:pic/hp:sz", NS)
+        if sz is not None:
+            return int(sz.get("width")), int(sz.get("height"))
+    except (ET.ParseError, OSError, TypeError, ValueError):
+        pass
+    return DEFAULT_PIC_SIZE
+
+
+def placement_pixels(size: Tuple[int, int], dpi: int = EXPORT_DPI) -> Tuple[int, int]:
+    width, height = size
+    return round(width / HWPUNIT_PER_INCH * dpi), round(height / HWPUNIT_PER_INCH * dpi)
+
+
+def fit_to_placement(img: Image.Image, target: Tuple[int, int]) -> Image.Image:
+    """
+    비율을 유지한 채 target 안에 맞추고 남는 부분은 흰색으로 채운다.
+    (그림 자리 크기와 비율이 다르면 한글에서 늘어나 보이므로)
+    """
+    tw, th = target
+    scale = min(tw / img.width, th / img.height)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    resized = img.resize(size, Image.LANCZOS)
+    canvas = Image.new("RGB", target, "white")
+    canvas.paste(resized, ((tw - size[0]) // 2, (th - size[1]) // 2))
+    return canvas
+
+
+def _encode_png(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.quantize(colors=PNG_COLORS, dither=Image.Dither.NONE).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def _encode_jpeg(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+def export_chart(src_path: str, dst_dir: str, name: str,
+                 placement: Tuple[int, int] = DEFAULT_PIC_SIZE, dpi: int = EXPORT_DPI) -> Path:
+    """
+    차트 PNG를 BinData에 넣을 이미지로 변환.
+
+    - placement: 그림 자리 크기 (HWPUNIT) → dpi 기준 픽셀 크기로 축소
+    - 팔레트 양자화 + 최적화 PNG 와 JPEG 중 작은 쪽을 저장 (name.png 또는 name.jpg)
+    """
+    with Image.open(src_path) as src:
+        if src.mode in ("RGBA", "LA", "P"):
+            src = src.convert("RGBA")
+            background = Image.new("RGB", src.size, "white")
+            background.paste(src, mask=src.split()[-1])
+            img = background
+        else:
+            img = src.convert("RGB")
+
+    img = fit_to_placement(img, placement_pixels(placement, dpi))
+    png_bytes, jpeg_bytes = _encode_png(img), _encode_jpeg(img)
+    data, suffix = (png_bytes, ".png") if len(png_bytes) <= len(jpeg_bytes) else (jpeg_bytes, ".jpg")
+
+    dst_path = Path(dst_dir) / f"{name}{suffix}"
+    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    dst_path.write_bytes(data)
+    print(f"    ✓ {dst_path.name} ({img.width}x{img.height}, {len(data) // 1024}KB)")
+    return dst_path
+
+
+def chart_bin_name(key: str) -> str:
+    """
+    차트 저장소 키로 만든 BinData 파일 이름 (확장자 제외).
+    표 제목은 LLM 이 만든 값이라 겹치거나 "/" 가 들어갈 수 있으므로 캡션으로만 쓴다.
+    """
+    return f"chart_{key}"
+
+
+def link_report_images(json_path: str, bin_names: Dict[str, List[str]]) -> int:
+    """
+    보고서 JSON 의 images[].filename (LLM 이 표 제목으로 적은 값)을 BinData 파일 이름으로 교체.
+
+    - bin_names: {표 제목: [BinData 파일 이름, ...]} — 같은 제목이 여러 번 나오면 순서대로 사용
+    - filename(확장자 제외) 또는 caption 이 표 제목과 같은 그림만 교체, 교체한 개수 반환
+    """
+    with open(json_path, encoding="utf-8") as f:
+        report = json.load(f)
+
+    remaining = {title: list(names) for title, names in bin_names.items()}
+    linked = 0
+    for topic in report.get("topics", []):
+        for main in topic.get("main_points", []):
+            for image in main.get("images") or []:
+                title = Path(image.get("filename", "")).stem
+                if not remaining.get(title):
+                    title = image.get("caption", "")
+                if remaining.get(title):
+                    image["filename"] = remaining[title].pop(0)
+                    linked += 1
+                else:
+                    print(f"⚠️ 그래프를 찾지 못한 그림: {image.get('filename')}")
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return linked
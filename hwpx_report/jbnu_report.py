@@ -4,6 +4,7 @@ import shutil
 import zipfile
 import time
 from datetime import datetime
+from hwpx_report.hwpx_compress import compress_type_for
 
 
 def copy_folder(src: str, dst: str):
@@ -32,7 +33,7 @@ def zip_as_hwpx(src_folder: str, output_hwpx: str):
     src_folder 안의 구조를 그대로 유지하면서 .hwpx(zip) 파일 생성.
 
     - mimetype 은 반드시 첫 번째, STORED(무압축)으로 넣고
-    - 나머지는 DEFLATED로 압축
+    - 이미 압축된 이미지(png/jpg 등)는 STORED, 나머지는 DEFLATED로 압축
     - ZIP 규격상 1980년 이전 타임스탬프는 허용되지 않으므로,
       그런 경우 최소 1980-01-01 00:00:00 으로 보정해서 넣는다.
     """
@@ -76,7 +77,7 @@ def zip_as_hwpx(src_folder: str, output_hwpx: str):
 
             print("    ✓ mimetype (STORED)")
 
-        # 2) 나머지 파일들: DEFLATED
+        # 2) 나머지 파일들: 이미지는 STORED, 그 외 DEFLATED
         for path in other_files:
             arcname = path.relative_to(src_path).as_posix()
 
@@ -87,9 +88,10 @@ def zip_as_hwpx(src_folder: str, output_hwpx: str):
 
             with path.open("rb") as f:
                 info = zipfile.ZipInfo(arcname, date_time=date_time)
-                info.compress_type = zipfile.ZIP_DEFLATED
+                info.compress_type = compress_type_for(path)
                 zf.writestr(info, f.read())
 
-            print(f"    ✓ {arcname} (DEFLATED)")
+            method = "STORED" if info.compress_type == zipfile.ZIP_STORED else "DEFLATED"
+            print(f"    ✓ {arcname} ({method})")
 
     print(f"  ✅ ZIP 생성 완료: {output_hwpx}")
@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from openpyxl import load_workbook
+
+from llm_agent.preprocess import excel_to_table, EmptySheetError
+from llm_agent.csv_2_db import upsert_tables, DB_PATH
+from llm_agent.worker_context import worker_context
+
+
+# ----------------------------- #
+# 대량 엑셀 적재
+#   모든 엑셀 파일의 모든 시트를 프로세스 풀에서 시트 단위로 전처리
+#   (preprocess_run 과 같은 excel_to_table: 파일 크기에 따라 메모리 / 스트리밍 경로, 같은 결과)
+#   작업자가 죽어 풀이 깨지면 (메모리 부족 등) 새 풀에서 끝나지 않은 시트만 다시 실행,
+#   MAX_POOL_RESTARTS 번 넘게 깨지면 시트마다 작업자 하나로 실행해 원인 시트만 실패 처리
+#   → SQLite 적재 / 검색 인덱스 반영은 메인 프로세스에서 순서대로 (DB 쓰기 잠금 경합 방지)
+# 실행: python -m llm_agent.bulk_ingest [파일 또는 폴더 ...] [--workers 8] [--db] [--index] [--report 결과.json]
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XLSX_DIR = os.path.join(BASE_DIR, "data", "xlsx_data")
+CSV_DIR = os.path.join(BASE_DIR, "data", "csv_data")
+INGEST_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+UNSAFE_NAME_PATTERN = re.compile(r'[\\/:*?"<>|\s]+')  # 파일명에 쓸 수 없는 문자 + 공백
+MAX_POOL_RESTARTS = 2
+
+
+def sheet_table_name(file_path, sheet_name, n_sheets):
+    """시트가 하나면 파일명 그대로 (preprocess_run과 같은 테이블), 여러 개면 파일명_시트명"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if n_sheets == 1:
+        return stem
+    return f"{stem}_{UNSAFE_NAME_PATTERN.sub('_', sheet_name).strip('_')}"
+
+
+def list_sheets(file_path):
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def collect_xlsx(paths):
+    """파일/폴더 목록 → 엑셀 파일 목록 (폴더는 *.xlsx)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.xlsx"))))
+        else:
+            files.append(path)
+    return files
+
+
+# ----------------------------- #
+# 작업자 프로세스에서 실행되는 함수
+# ----------------------------- #
+def _process_sheet(file_path, sheet_name, table_name, save_path):
+    """시트 하나 전처리. 예외는 결과로 돌려준다 (한 시트 실패가 풀 전체를 멈추지 않도록)"""
+    result = {"file": os.path.basename(file_path), "sheet": sheet_name, "table": table_name}
+    start = time.perf_counter()
+    try:
+        result["csv_path"] = excel_to_table(file_path, save_path, sheet_name=sheet_name,
+                                            table_name=table_name)
+        result["status"] = "ok"
+    except EmptySheetError:
+        result["status"] = "skipped"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# ----------------------------- #
+# 적재
+# ----------------------------- #
+def _run_sheets(tasks, save_path, workers, on_done):
+    """
+    프로세스 풀에서 시트 전처리, 끝난 시트마다 on_done(result) 호출.
+    반환: 풀이 깨져 끝나지 못한 작업 목록 (원래 순서)
+    """
+    unfinished = set()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+        futures = {pool.submit(_process_sheet, fp, sheet, table, save_path): i
+                   for i, (fp, sheet, table) in enumerate(tasks)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:  # 작업자가 죽은 경우 (메모리 부족 등)
+                unfinished.add(futures[future])
+                continue
+            on_done(result)
+    return [tasks[i] for i in sorted(unfinished)]
+
+
+def plan_sheets(xlsx_paths):
+    """(파일, 시트, 테이블명) 작업 목록 + 시트 목록을 읽지 못한 파일의 실패 결과"""
+    tasks, failures, seen = [], [], {}
+    for fp in xlsx_paths:
+        try:
+            sheets = list_sheets(fp)
+        except Exception as e:
+            failures.append({"file": os.path.basename(fp), "sheet": None, "table": None,
+                             "status": "failed", "error": f"{type(e).__name__}: {e}", "seconds": 0.0})
+            continue
+        for sheet in sheets:
+            table = sheet_table_name(fp, sheet, len(sheets))
+            if table in seen:
+                failures.append({"file": os.path.basename(fp), "sheet": sheet, "table": table,
+                                 "status": "failed", "error": f"테이블명 중복 ({seen[table]})", "seconds": 0.0})
+                continue
+            seen[table] = os.path.basename(fp)
+            tasks.append((fp, sheet, table))
+    return tasks, failures
+
+
+def ingest_workbooks(xlsx_paths, save_path=CSV_DIR, workers=INGEST_WORKERS,
+                     db_path=None, update_index=False, on_result=None):
+    """
+    엑셀 파일들의 모든 시트 전처리 → (선택) SQLite 적재 → (선택) 검색 인덱스 반영.
+    on_result(result, 끝난 수, 전체 수): 시트 하나가 끝날 때마다 호출 (진행 상황 표시용)
+    반환: {"sheets": [시트별 결과], "loaded": [적재한 테이블], "seconds": 전체 시간}
+    """
+    start = time.perf_counter()
+    os.makedirs(save_path, exist_ok=True)
+    tasks, results = plan_sheets(xlsx_paths)
+    total = len(tasks) + len(results)
+    print(f"[INFO] 엑셀 {len(xlsx_paths)}개, 시트 {len(tasks)}개 전처리 (작업자 {workers}개)")
+
+    def report(result, n_done):
+        mark = {"ok": "✅", "skipped": "⚠️"}.get(result["status"], "❌")
+        print(f"{mark} {result['file']} [{result['sheet']}] → {result['table']} "
+              f"({result['seconds']}초) {result.get('error', '')}")
+        if on_result is not None:
+            on_result(result, n_done, total)
+
+    for n, result in enumerate(results, 1):  # 시트 목록을 읽지 못한 파일 / 테이블명 중복
+        report(result, n)
+
+    def done(result):
+        results.append(result)
+        report(result, len(results))
+
+    pending, restarts = tasks, 0
+    while pending and restarts <= MAX_POOL_RESTARTS:
+        if restarts:
+            print(f"⚠️ 작업자 종료 → 끝나지 않은 시트 {len(pending)}개를 새 풀에서 다시 실행")
+        pending = _run_sheets(pending, save_path, workers, done)
+        restarts += 1
+
+    # 계속 깨지면 시트마다 작업자 하나로 실행 → 작업자를 죽이는 시트만 실패 처리
+    for fp, sheet, table in pending:
+        if _run_sheets([(fp, sheet, table)], save_path, 1, done):
+            done({"file": os.path.basename(fp), "sheet": sheet, "table": table,
+                  "status": "failed", "error": "작업자 종료 (메모리 부족 등)", "seconds": 0.0})
+
+    csv_paths = [r["csv_path"] for r in results if r["status"] == "ok"]
+    loaded = upsert_tables(csv_paths, db_path) if db_path is not None and csv_paths else []
+
+    if update_index:
+        from llm_agent.index_update import update_index_for_table  # 임베딩 모델은 필요할 때만 로딩
+        for cp in csv_paths:
+            try:
+                update_index_for_table(cp)
+            except Exception as e:
+                print(f"⚠️ 검색 인덱스 업데이트 실패: {cp}, 이유: {e}")
+
+    summary = {status: sum(r["status"] == status for r in results) for status in ("ok", "skipped", "failed")}
+    seconds = round(time.perf_counter() - start, 3)
+    print(f"[INFO] 완료: 성공 {summary['ok']} / 빈 시트 {summary['skipped']} / 실패 {summary['failed']} ({seconds}초)")
+    return {"sheets": results, "loaded": loaded, "seconds": seconds}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="엑셀 파일의 모든 시트를 병렬로 전처리")
+    parser.add_argument("paths", nargs="*", default=[XLSX_DIR], help="엑셀 파일 또는 폴더")
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--db", nargs="?", const=DB_PATH, default=None, help="SQLite에도 적재 (기본 경로: data/database.db)")
+    parser.add_argument("--index", action="store_true", help="검색 인덱스에도 반영")
+    parser.add_argument("--report", help="시트별 결과를 JSON으로 저장")
+    args = parser.parse_args()
+
+    report = ingest_workbooks(collect_xlsx(args.paths), args.csv_dir, args.workers,
+                              db_path=args.db, update_index=args.index)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if any(r["status"] == "failed" for r in report["sheets"]) else 0)
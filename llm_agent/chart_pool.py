@@ -0,0 +1,64 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from llm_agent.worker_context import worker_context
+
+
+# ----------------------------- #
+# 차트 렌더링 프로세스 풀 (matplotlib Agg 백엔드)
+#   - 표 여러 개를 동시에 렌더링 (200dpi 렌더링이 직렬로 쌓이지 않도록)
+#   - 서버 프로세스의 pyplot 상태와 분리 (작업자는 forkserver로 시작, llm_agent/worker_context.py)
+# ----------------------------- #
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+    plt.rcParams["font.family"] = "NanumGothic"
+    plt.rcParams["axes.unicode_minus"] = False
+
+
+def get_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=worker_context(),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def reset_render_pool():
+    """작업자 프로세스가 죽어 풀이 깨졌을 때 새 풀로 교체"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ----------------------------- #
+# 작업자 프로세스에서 실행되는 함수
+# ----------------------------- #
+def render_rule_chart(df, name):
+    """규칙 기반 렌더링 → 차트 저장소 키. 차트 종류를 정할 수 없으면 None"""
+    from llm_agent.chart_renderer import RENDERER_VERSION, choose_chart, render_chart
+    from llm_agent import chart_store
+
+    spec = choose_chart(df, subject=name)
+    if spec is None:
+        return None
+    key = chart_store.chart_key(df, {"renderer": "rules", "version": RENDERER_VERSION, **spec})
+    if chart_store.lookup(key):
+        print(f"[chart_pool] 저장된 차트 사용: {name} → {key}")
+        return key
+    tmp_path = os.path.join(chart_store.STORE_DIR, chart_store.tmp_name(key) + ".png")
+    render_chart(df, spec, tmp_path)
+    chart_store.commit(key, tmp_path)
+    print(f"[chart_pool] 규칙 기반 차트: {spec['kind']} → {key}")
+    return key
@@ -0,0 +1,353 @@
+import re
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from matplotlib.ticker import FuncFormatter
+
+
+# ----------------------------- #
+# 규칙 기반 차트 렌더러 (LLM 코드 생성 없이)
+#
+# graph.design_prompt 의 결정 규칙을 그대로 코드로 옮긴 것:
+#   - 시계열(연도/월 등) x축: 시점이 12개 넘으면 선 그래프(값 여러 개 → 다중 선), 12개 이하면 막대(묶은 막대)
+#     (숫자 열은 이름이 시점을 뜻할 때만 시계열로 봄)
+#   - 범주형 x축, 값 하나: 구성비(비율·비중 등)이고 6개 이하 → 파이, 10개 이하 → 세로 막대, 초과 → 가로 막대
+#   - 범주형 x축, 값 여러 개: 10개 이하 → 묶은 세로 막대, 초과 → 묶은 가로 막대, 큰 행렬 → 히트맵
+#   - 숫자 열 두 개뿐 → 산점도
+#   - 연도 + 범주 + 값 (긴 형식) → 범주별 다중 선 그래프 (시점 12개 이하면 범주별 묶은 막대)
+# 규칙으로 정할 수 없는 표는 choose_chart 가 None 을 돌려주고 LLM 경로를 사용한다.
+# pyplot 상태 / 전역 rcParams를 바꾸지 않고 Figure 객체에 글꼴과 눈금 형식을 직접 지정한다.
+# (plt.rc_context는 전역 rcParams를 잠시 바꾸므로 다른 스레드의 그리기에 영향을 준다)
+# ----------------------------- #
+RENDERER_VERSION = 3  # 그리는 방식이 바뀌면 올림 (차트 저장소 키에 포함)
+BAR_MAX_ITEMS = 10
+LINE_MIN_TIME_POINTS = 12  # 시점이 이보다 많으면 선 그래프, 이하면 막대
+PIE_MAX_CATEGORIES = 6
+HEATMAP_MIN_COLUMNS = 8
+DPI = 200
+FONT_FAMILY = "NanumGothic"
+
+TIME_COLUMN_PATTERN = re.compile(r"^(기준\s*)?(연도|년도|년|월|분기|일자|날짜|시점|기간|year|month|date)(별)?$", re.IGNORECASE)
+TIME_VALUE_PATTERN = re.compile(r"^\s*(19|20)\d{2}(\s*년)?([.\-/]\s*\d{1,2}(\s*월)?)?\s*$")
+COMPOSITION_PATTERN = re.compile(r"(비율|비중|구성|점유|%|퍼센트)")
+
+
+def _label(text):
+    """축/범례 표시용: 밑줄 → 띄어쓰기"""
+    return str(text).replace("_", " ").strip()
+
+
+def _to_numeric(series):
+    """'1,234' 같은 문자열 숫자도 숫자로 (변환 안 되는 값이 절반 넘으면 None)"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    converted = pd.to_numeric(series.astype(str).str.replace(",", "").str.strip(), errors="coerce")
+    if converted.notna().sum() < max(1, series.notna().sum()) / 2:
+        return None
+    return converted
+
+
+def is_time_column(name, series):
+    """
+    시점 열: 이름이 시점을 뜻하거나(연도/년/월/year 등), 문자열 값이 모두 날짜 형식("2023년", "2023.01").
+    숫자 열은 이름으로만 판단 (값이 1900~2100인 건수/금액 열을 연도로 오인하지 않도록)
+    """
+    if TIME_COLUMN_PATTERN.search(str(name).strip()):
+        return True
+    if pd.api.types.is_numeric_dtype(series):
+        return False
+    values = series.dropna().astype(str)
+    return len(values) > 0 and values.map(lambda v: bool(TIME_VALUE_PATTERN.match(v))).all()
+
+
+def _is_year_values(series):
+    values = pd.to_numeric(series, errors="coerce").dropna()
+    return len(values) > 0 and (values == values.round()).all() and values.between(1900, 2100).all()
+
+
+def prepare_table(df):
+    """
+    (x 열, 값 열 목록, 계열 열, 정리된 DataFrame) 반환.
+    - 이름이 시점을 뜻하는 숫자 열(연도/월 등)이 있으면 그 열이 x, 문자열 열은 계열(긴 형식 표: 지역, 연도, 값)
+    - 없으면 첫 번째 문자열 열이 x
+    """
+    df = df.copy()
+    numeric, others = [], []
+    for col in df.columns:
+        converted = _to_numeric(df[col])
+        if converted is None:
+            others.append(col)
+        else:
+            df[col] = converted
+            numeric.append(col)
+
+    time_cols = [c for c in numeric if is_time_column(c, df[c])]
+    values = [c for c in numeric if c not in time_cols]
+    if time_cols:
+        series_col = others[0] if len(others) == 1 else None
+        if len(others) > 1 or len(time_cols) > 1:
+            return None, [], None, df  # 기준 열이 여러 개인 표는 규칙으로 정하지 않음
+        return time_cols[0], values, series_col, df
+    return (others[0] if others else None), values, None, df
+
+
+def _pivot(data, spec):
+    """긴 형식 표 → x 행, 계열별 열"""
+    wide = data.pivot_table(index=spec["x"], columns=spec["pivot"], values=spec["value"], aggfunc="sum")
+    wide.columns = [str(c) for c in wide.columns]
+    return wide.reset_index()
+
+
+def choose_chart(df, subject=""):
+    """
+    차트 규격 dict 반환: {"kind", "x", "y", "time"} (+ 긴 형식 표면 "pivot", "value")
+    규칙으로 정할 수 없으면 None (→ LLM 경로)
+    """
+    if df is None or df.empty:
+        return None
+    x_col, y_cols, series_col, data = prepare_table(df)
+    if not y_cols:
+        return None
+    data = data.dropna(subset=y_cols, how="all")
+    n = len(data)
+    if n == 0:
+        return None
+
+    if x_col is None:
+        if len(y_cols) == 2:
+            return {"kind": "scatter", "x": y_cols[0], "y": [y_cols[1]], "time": False}
+        return None
+
+    if series_col is not None:
+        # 지역별 연도 추이 같은 긴 형식: 계열마다 선 하나
+        series = [str(v) for v in data[series_col].dropna().unique()]
+        if len(y_cols) != 1 or not 1 < len(series) <= BAR_MAX_ITEMS:
+            return None
+        n_points = data[x_col].nunique()
+        return {"kind": "multi_line" if n_points > LINE_MIN_TIME_POINTS else "grouped_bar",
+                "x": x_col, "y": series, "time": True, "pivot": series_col, "value": y_cols[0]}
+
+    if is_time_column(x_col, data[x_col]):
+        if n > LINE_MIN_TIME_POINTS:
+            kind = "line" if len(y_cols) == 1 else "multi_line"
+        else:
+            kind = "bar" if len(y_cols) == 1 else "grouped_bar"  # 시점이 적으면 막대 (시간 순서 유지)
+        return {"kind": kind, "x": x_col, "y": y_cols, "time": True}
+
+    if len(y_cols) == 1:
+        y = y_cols[0]
+        composition = COMPOSITION_PATTERN.search(f"{subject} {y}") is not None
+        if composition and n <= PIE_MAX_CATEGORIES and (data[y].dropna() >= 0).all():
+            return {"kind": "pie", "x": x_col, "y": [y], "time": False}
+        return {"kind": "bar" if n <= BAR_MAX_ITEMS else "barh", "x": x_col, "y": [y], "time": False}
+
+    if len(y_cols) >= HEATMAP_MIN_COLUMNS and n > BAR_MAX_ITEMS:
+        return {"kind": "heatmap", "x": x_col, "y": y_cols, "time": False}
+    return {"kind": "grouped_bar" if n <= BAR_MAX_ITEMS else "grouped_barh", "x": x_col, "y": y_cols, "time": False}
+
+
+# ----------------------------- #
+# 그리기
+# ----------------------------- #
+def _new_figure(n_items, square=False):
+    figsize = (6, 6) if square else (max(6, n_items * 1.0), max(6, n_items * 0.8))
+    fig = Figure(figsize=figsize, dpi=DPI)
+    ax = fig.add_subplot()
+    return fig, ax, fig.get_size_inches()[1]
+
+
+def _style_axes(ax, base_height, xlabel, ylabel):
+    ax.set_xlabel(_label(xlabel), fontsize=base_height * 1.8)
+    ax.set_ylabel(_label(ylabel), fontsize=base_height * 1.8)
+    ax.tick_params(labelsize=base_height * 0.9)
+    ax.grid(True, zorder=0, color="gray", alpha=0.3)
+    ax.set_axisbelow(True)
+    for spine in ax.spines.values():
+        spine.set_visible(True)
+        spine.set_linewidth(0.8)
+        spine.set_zorder(3)
+
+
+def _apply_font(fig):
+    """그림 안의 모든 글자(축 이름, 눈금, 범례, 값 표시)에 한글 글꼴 지정.
+    나중에 생기는 눈금 글자는 첫 눈금의 글꼴을 복사하므로 여기서 한 번이면 된다"""
+    for text in fig.findobj(Text):
+        text.set_fontfamily(FONT_FAMILY)
+
+
+def _comma_formatter():
+    return FuncFormatter(lambda v, _: f"{v:,.0f}")
+
+
+def _value_text(v):
+    return f"{v:,.0f}" if float(v).is_integer() or abs(v) >= 100 else f"{v:,.1f}"
+
+
+def _x_labels(values, time_axis):
+    if time_axis and _is_year_values(values):
+        return [str(int(v)) for v in pd.to_numeric(values)]
+    return [_label(v) for v in values]
+
+
+def _annotate_vertical(ax, bars, values, fontsize):
+    ymin, ymax = ax.get_ylim()
+    offset = (ymax - ymin) * 0.01
+    for bar, v in zip(bars, values):
+        if pd.isna(v):
+            continue
+        y, va = (v + offset, "bottom") if v >= 0 else (v - offset, "top")
+        ax.text(bar.get_x() + bar.get_width() / 2, y, _value_text(v), ha="center", va=va,
+                fontsize=fontsize, zorder=4, color="black", fontweight="bold")
+
+
+def _annotate_horizontal(ax, bars, values, fontsize):
+    xmin, xmax = ax.get_xlim()
+    offset = (xmax - xmin) * 0.01
+    for bar, v in zip(bars, values):
+        if pd.isna(v):
+            continue
+        x, ha = (v + offset, "left") if v >= 0 else (v - offset, "right")
+        ax.text(x, bar.get_y() + bar.get_height() / 2, _value_text(v), ha=ha, va="center",
+                fontsize=fontsize, zorder=4, color="black", fontweight="bold")
+
+
+def _draw_line(ax, data, spec, base_height, colors):
+    data = data.sort_values(spec["x"])
+    positions = np.arange(len(data))
+    fontsize = base_height * 0.8
+    multi = len(spec["y"]) > 1
+    for i, y in enumerate(spec["y"]):
+        # 선 하나면 색을 지정하지 않음 (기본 색)
+        kwargs = {"color": colors[i % len(colors)], "label": _label(y)} if multi else {}
+        ax.plot(positions, data[y].values, marker="o", zorder=2, **kwargs)
+    ymin, ymax = ax.get_ylim()
+    offset = (ymax - ymin) * 0.01
+    for y in spec["y"]:
+        for xi, yi in zip(positions, data[y].values):
+            if pd.notna(yi):
+                ax.text(xi, yi + offset, _value_text(yi), ha="center", va="bottom",
+                        fontsize=fontsize, zorder=4, color="black", fontweight="bold")
+    ax.set_xticks(positions)
+    ax.set_xticklabels(_x_labels(data[spec["x"]], spec["time"]))
+    ax.yaxis.set_major_formatter(_comma_formatter())
+    _style_axes(ax, base_height, spec["x"], spec["y"][0] if not multi else "값")
+    if multi:
+        ax.legend(fontsize=base_height * 1.2, loc="best")
+
+
+def _draw_bar(ax, data, spec, base_height, colors):
+    y = spec["y"][0]
+    if spec["time"]:
+        data = data.sort_values(spec["x"])  # 시계열은 시간 순서
+    else:
+        data = data.sort_values(y, ascending=spec["kind"] == "barh")
+    labels = _x_labels(data[spec["x"]], spec["time"])
+    values = data[y].values
+    positions = np.arange(len(data))
+    bar_colors = [colors[i % len(colors)] for i in range(len(data))]
+    if spec["kind"] == "bar":
+        bars = ax.bar(positions, values, width=0.6, color=bar_colors, zorder=2)
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels)
+        ax.yaxis.set_major_formatter(_comma_formatter())
+        _style_axes(ax, base_height, spec["x"], y)
+        _annotate_vertical(ax, bars, values, base_height * 0.8)
+    else:
+        bars = ax.barh(positions, values, height=0.6, color=bar_colors, zorder=2)
+        ax.set_yticks(positions)
+        ax.set_yticklabels(labels)
+        ax.xaxis.set_major_formatter(_comma_formatter())
+        _style_axes(ax, base_height, y, spec["x"])
+        _annotate_horizontal(ax, bars, values, base_height * 0.8)
+
+
+def _draw_grouped_bar(ax, data, spec, base_height, colors):
+    if spec["time"]:
+        data = data.sort_values(spec["x"])
+    labels = _x_labels(data[spec["x"]], spec["time"])
+    positions = np.arange(len(data))
+    width = 0.6 / len(spec["y"])
+    horizontal = spec["kind"] == "grouped_barh"
+    for i, y in enumerate(spec["y"]):
+        shift = positions - 0.3 + width * (i + 0.5)
+        values = data[y].values
+        if horizontal:
+            bars = ax.barh(shift, values, height=width, color=colors[i % len(colors)], label=_label(y), zorder=2)
+        else:
+            bars = ax.bar(shift, values, width=width, color=colors[i % len(colors)], label=_label(y), zorder=2)
+        annotate = _annotate_horizontal if horizontal else _annotate_vertical
+        annotate(ax, bars, values, base_height * 0.6)
+    if horizontal:
+        ax.set_yticks(positions)
+        ax.set_yticklabels(labels)
+        ax.xaxis.set_major_formatter(_comma_formatter())
+        _style_axes(ax, base_height, "값", spec["x"])
+    else:
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels)
+        ax.yaxis.set_major_formatter(_comma_formatter())
+        _style_axes(ax, base_height, spec["x"], "값")
+    ax.legend(fontsize=base_height * 1.2, loc="best")
+
+
+def _draw_pie(ax, data, spec, base_height, colors):
+    y = spec["y"][0]
+    data = data.dropna(subset=[y]).sort_values(y, ascending=False)
+    ax.pie(data[y], labels=[_label(v) for v in data[spec["x"]]], startangle=90, counterclock=True,
+           autopct="%1.1f%%", colors=colors[:len(data)],
+           textprops={"fontsize": base_height * 1.5})
+    ax.axis("equal")
+
+
+def _draw_scatter(ax, data, spec, base_height, colors):
+    x, y = spec["x"], spec["y"][0]
+    ax.scatter(data[x], data[y], color=colors[0], zorder=2)
+    ax.xaxis.set_major_formatter(_comma_formatter())
+    ax.yaxis.set_major_formatter(_comma_formatter())
+    _style_axes(ax, base_height, x, y)
+
+
+def _draw_heatmap(ax, data, spec, base_height, colors):
+    matrix = data[spec["y"]].to_numpy(dtype=float)
+    image = ax.imshow(matrix, aspect="auto", cmap="Reds", zorder=2)
+    colorbar = ax.figure.colorbar(image, ax=ax)
+    colorbar.ax.yaxis.set_major_formatter(_comma_formatter())
+    ax.set_xticks(np.arange(len(spec["y"])))
+    ax.set_xticklabels([_label(c) for c in spec["y"]], rotation=45, ha="right")
+    ax.set_yticks(np.arange(len(data)))
+    ax.set_yticklabels(_x_labels(data[spec["x"]], spec["time"]))
+    _style_axes(ax, base_height, "항목", spec["x"])
+    ax.grid(False)
+
+
+DRAWERS = {
+    "line": _draw_line,
+    "multi_line": _draw_line,
+    "bar": _draw_bar,
+    "barh": _draw_bar,
+    "grouped_bar": _draw_grouped_bar,
+    "grouped_barh": _draw_grouped_bar,
+    "pie": _draw_pie,
+    "scatter": _draw_scatter,
+    "heatmap": _draw_heatmap,
+}
+
+
+def render_chart(df, spec, path):
+    """spec(choose_chart 결과)대로 그려 path에 PNG 저장 (제목 없음)"""
+    _, _, _, data = prepare_table(df)
+    if "pivot" in spec:
+        data = _pivot(data, spec)
+    data = data.dropna(subset=spec["y"], how="all").reset_index(drop=True)
+    n_items = len(data) if spec["kind"] != "heatmap" else max(len(data), len(spec["y"]))
+
+    # 숫자 눈금은 모두 _comma_formatter(ASCII 빼기 기호)라 axes.unicode_minus 설정이 필요 없음
+    fig, ax, base_height = _new_figure(n_items, square=spec["kind"] == "pie")
+    colors = plt.get_cmap("Set1").colors
+    DRAWERS[spec["kind"]](ax, data, spec, base_height, colors)
+    _apply_font(fig)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
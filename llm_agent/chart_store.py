@@ -0,0 +1,109 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import hashlib
+import pandas as pd
+
+
+# ----------------------------- #
+# 내용 주소 기반 차트 저장소
+#   키 = DataFrame 내용 지문 + 차트 규격(렌더러, 차트 종류, 코드 해시 등)
+#   - 같은 표는 제목이 달라도 다시 그리지 않고, 제목이 같아도 다른 표는 덮어쓰지 않는다
+#   - data/chart_store/<키>.png, 접근 시 mtime 갱신 → 용량 초과 시 오래 안 쓴 것부터 삭제 (LRU)
+#   - 서버의 /static/graph/<키>.png 가 이 폴더를 그대로 제공
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.join(BASE_DIR, "data", "chart_store")
+MAX_STORE_BYTES = 512 * 1024 ** 2
+TMP_MARK = ".tmp"
+KEY_LENGTH = 32
+KEY_PATTERN = re.compile(rf"^[0-9a-f]{{{KEY_LENGTH}}}$")
+
+
+def dataframe_fingerprint(df):
+    """열 이름 + dtype + 셀 값 기준 해시 (같은 내용이면 같은 값)"""
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns], ensure_ascii=False).encode("utf-8"))
+    h.update(json.dumps([str(t) for t in df.dtypes]).encode("utf-8"))
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:  # 리스트 같은 해시 불가능한 셀
+        h.update(df.to_csv(index=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chart_key(df, spec):
+    """spec: JSON으로 직렬화 가능한 dict (차트를 결정하는 모든 값)"""
+    payload = dataframe_fingerprint(df) + json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+    return text_digest(payload)[:KEY_LENGTH]
+
+
+def store_path(key):
+    return os.path.join(STORE_DIR, f"{key}.png")
+
+
+def tmp_name(key):
+    """렌더링 중 임시 파일 이름 (확장자 제외). 완료 후 commit으로 교체"""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    return f"{key}.{uuid.uuid4().hex[:8]}{TMP_MARK}"
+
+
+def is_valid_key(key):
+    """chart_key 형식(소문자 16진수 32자)인지 확인 (요청 경로로 받은 키를 파일 경로로 쓰기 전에 검사)"""
+    return bool(KEY_PATTERN.match(key))
+
+
+def lookup(key):
+    """있으면 경로 (사용 시각 갱신), 없으면 None (키 형식이 아니면 파일 시스템에 접근하지 않음)"""
+    if not is_valid_key(key):
+        return None
+    path = store_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def commit(key, tmp_path):
+    """임시 파일을 키 이름으로 교체하고 용량 제한 적용"""
+    os.replace(tmp_path, store_path(key))
+    evict()
+    return store_path(key)
+
+
+def alias(src_key, dst_key):
+    """같은 PNG를 다른 키로도 찾을 수 있게 (하드링크, 안 되면 복사)"""
+    if src_key == dst_key or lookup(dst_key):
+        return
+    tmp_path = os.path.join(STORE_DIR, tmp_name(dst_key) + ".png")
+    try:
+        os.link(store_path(src_key), tmp_path)
+    except OSError:
+        shutil.copyfile(store_path(src_key), tmp_path)
+    commit(dst_key, tmp_path)
+
+
+def evict(max_bytes=MAX_STORE_BYTES):
+    """전체 크기가 max_bytes를 넘으면 mtime이 오래된 것부터 삭제"""
+    entries = []
+    with os.scandir(STORE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".png") and TMP_MARK not in entry.name:
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
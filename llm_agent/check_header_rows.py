@@ -0,0 +1,168 @@
+import os
+import sys
+import glob
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from llm_agent.preprocess import infer_header_rows
+
+
+# ----------------------------- #
+# 헤더 줄 수 추론 검사
+#   1. 내장 표본(SAMPLE_SHEETS): 기대값을 코드에 고정 → 엑셀 파일 없이 항상 검사
+#   2. data/xlsx_data/*.xlsx 가 있으면 각 파일 결과를 골든 파일과 비교
+#      골든 값은 예전 행 단위 반복 구현(legacy_infer_header_rows)으로 생성 (--update)
+# 실행: python -m llm_agent.check_header_rows [--update]
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XLSX_DIR = os.path.join(BASE_DIR, "data", "xlsx_data")
+GOLDEN_PATH = os.path.join(BASE_DIR, "data", "header_rows_golden.json")
+
+NA = np.nan
+# 이름: (read_excel(header=None) 으로 읽은 것과 같은 원본 행, 기대 헤더 줄 수)
+SAMPLE_SHEETS = {
+    "single_header": ([
+        ["지역", "인구", "면적"],
+        ["전주시", 650000, 206.2],
+        ["군산시", 260000, 395.9],
+    ], 1),
+    "merged_two_rows": ([
+        ["지역", "인구", "인구", "면적"],
+        [NA, "남자", "여자", NA],
+        ["전주시", 320000, 330000, 206.2],
+        ["익산시", 130000, 135000, 507.0],
+    ], 2),
+    "merged_three_rows": ([
+        ["구분", "2023년", "2023년", "2023년", "2023년"],
+        [NA, "교원", "교원", "학생", "학생"],
+        [NA, "남", "여", "남", "여"],
+        ["전북대", 900, 300, 12000, 11000],
+        ["군산대", 300, 100, 4000, 3500],
+    ], 3),
+    "dash_placeholder": ([
+        ["구분", "-", "-", "합계"],
+        ["전주시", 1, 2, 3],
+        ["익산시", 4, 5, 9],
+    ], 1),
+    "empty_column": ([
+        ["지역", NA, "인구", "인구"],
+        [NA, NA, "남", "여"],
+        ["전주시", NA, 1, 2],
+    ], 2),
+    "repeated_values_in_data": ([
+        ["지역", "값"],
+        ["합계", "합계"],
+        ["합계", "합계"],
+    ], 1),
+}
+
+
+def legacy_infer_header_rows(df):
+    """벡터화 이전 구현 (골든 값 생성용, 동작 변경 금지)"""
+    df_copy = df.copy()
+    max_depth = len(df_copy)
+    depth = 1
+
+    row0 = df_copy.iloc[0].ffill().to_list()
+    df_copy.iloc[0] = row0
+    for i in range(len(row0) - 1):
+        val1, val2 = row0[i], row0[i + 1]
+        if pd.notna(val1) and pd.notna(val2) and val1 == val2 and val1 not in ["", "-"]:
+            depth = 2
+            break
+
+    for row_idx in range(1, max_depth):
+        df_copy.iloc[:row_idx] = df_copy.iloc[:row_idx].ffill()
+        row = df_copy.iloc[row_idx].ffill().to_list()
+        prev_row = df_copy.iloc[row_idx - 1].ffill().to_list()
+        df_copy.iloc[row_idx] = row
+
+        repeated_with_change = False
+        for i in range(len(row) - 1):
+            val1, val2 = row[i], row[i + 1]
+            prev_val1, prev_val2 = prev_row[i], prev_row[i + 1]
+            if (
+                pd.notna(val1) and pd.notna(val2) and val1 == val2 and val1 not in ["", "-"] and
+                pd.notna(prev_val1) and pd.notna(prev_val2) and prev_val1 == prev_val2
+            ):
+                repeated_with_change = True
+                break
+
+        if repeated_with_change:
+            depth += 1
+        else:
+            break
+
+    return depth
+
+
+def prepare_raw_sheet(df_raw):
+    """preprocess_excel_with_variable_header 의 Step 1~2 와 같은 입력"""
+    df_raw = df_raw.dropna(axis=1, how="all")
+    return df_raw.ffill()
+
+
+def load_raw_sheet(file_path):
+    return prepare_raw_sheet(pd.read_excel(file_path, header=None))
+
+
+def check_samples():
+    """내장 표본 검사. 반환: 불일치 수"""
+    failures = 0
+    for name, (rows, expected) in SAMPLE_SHEETS.items():
+        got = infer_header_rows(prepare_raw_sheet(pd.DataFrame(rows, dtype=object)))
+        if got != expected:
+            failures += 1
+            print(f"❌ 표본 {name}: 기대 {expected}, 결과 {got}")
+    print(f"[INFO] 내장 표본 {len(SAMPLE_SHEETS)}개 중 불일치 {failures}개")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--xlsx-dir", default=XLSX_DIR)
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--update", action="store_true", help="예전 구현으로 골든 파일 다시 생성")
+    args = parser.parse_args()
+
+    xlsx_paths = sorted(glob.glob(os.path.join(args.xlsx_dir, "*.xlsx")))
+    if args.update:
+        if not xlsx_paths:
+            print(f"❌ 엑셀 샘플 없음: {args.xlsx_dir}")
+            return 1
+        golden = {os.path.basename(p): legacy_infer_header_rows(load_raw_sheet(p)) for p in xlsx_paths}
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"✅ 골든 파일 저장: {args.golden} ({len(golden)}개)")
+        return 0
+
+    failures = check_samples()
+    if not xlsx_paths:
+        print(f"[INFO] 엑셀 샘플 없음: {args.xlsx_dir} (내장 표본만 검사)")
+        return 1 if failures else 0
+    if not os.path.exists(args.golden):
+        print(f"❌ 골든 파일 없음: {args.golden} (--update 로 생성)")
+        return 1
+
+    with open(args.golden, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    file_failures = 0
+    for path in xlsx_paths:
+        name = os.path.basename(path)
+        if name not in golden:
+            print(f"⚠️ 골든 값 없음: {name} (--update 로 생성)")
+            continue
+        got = infer_header_rows(load_raw_sheet(path))
+        if got != golden[name]:
+            file_failures += 1
+            print(f"❌ {name}: 기대 {golden[name]}, 결과 {got}")
+
+    print(f"[INFO] {len(xlsx_paths)}개 중 불일치 {file_failures}개")
+    return 1 if failures or file_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
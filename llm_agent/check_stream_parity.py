@@ -0,0 +1,143 @@
+import os
+import re
+import sys
+import glob
+import shutil
+import zipfile
+import argparse
+import tempfile
+import pandas as pd
+from openpyxl import Workbook
+
+from llm_agent.preprocess import preprocess_excel_with_variable_header, iter_excel_chunks
+
+
+# ----------------------------- #
+# 스트리밍 전처리 결과 비교
+#   같은 엑셀을 preprocess_excel_with_variable_header(pd.read_excel) 와
+#   iter_excel_chunks(openpyxl read_only) 로 읽어 저장될 CSV 내용이 같은지 확인
+#   1. 내장 표본(SAMPLE_SHEETS): 임시 엑셀을 만들어 항상 검사
+#      dimension 이 있으면 시트의 <dimension ref> 기록을 그 값으로 바꿔 저장 (기록이 틀린 파일 재현)
+#   2. data/xlsx_data/*.xlsx 가 있으면 각 파일도 검사
+# 실행: python -m llm_agent.check_stream_parity
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XLSX_DIR = os.path.join(BASE_DIR, "data", "xlsx_data")
+
+PARITY_CHUNK_ROWS = 2  # 청크 경계의 ffill 도 검사되도록 작게
+
+NA = None
+# 이름: (시트 행, 덮어쓸 <dimension ref> 또는 None)
+SAMPLE_SHEETS = {
+    "single_header": ([
+        ["지역", "인구", "면적"],
+        ["전주시", 650000, 206.2],
+        ["군산시", 260000, 395.9],
+        ["익산시", 270000, 507.0],
+    ], None),
+    "merged_header_blank_rows": ([
+        ["지역", "인구", "인구", "면적"],
+        [NA, "남자", "여자", NA],
+        ["전주시", 320000, 330000, 206.2],
+        [NA, NA, NA, NA],
+        ["익산시", 130000, 135000, "-"],
+        [NA, 1, 2, 3],
+        [NA, NA, NA, NA],
+    ], None),
+    "na_strings": ([
+        ["구분", "값", "비고"],
+        ["가", "N/A", "#DIV/0!"],
+        ["나", 1.0, "NULL"],
+        ["다", 2.5, "X"],
+    ], None),
+    "wrong_dimension": ([
+        ["지역", "2022년", "2023년", "2024년"],
+        ["전주시", 1, 2, 3],
+        ["군산시", 4, 5, 6],
+        ["익산시", 7, 8, 9],
+        ["정읍시", 10, 11, 12],
+    ], "A1:B2"),  # 실제보다 작은 범위 → read_only 모드가 기록만 믿으면 행/열이 잘림
+}
+
+
+def write_sample_xlsx(path, rows, dimension=None):
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    if dimension is None:
+        return
+
+    # 시트 XML 의 <dimension ref="..."/> 만 바꿔 다시 압축
+    sheet_xml = "xl/worksheets/sheet1.xml"
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == sheet_xml:
+                data = re.sub(rb'<dimension ref="[^"]*"', f'<dimension ref="{dimension}"'.encode(), data)
+            dst.writestr(item, data)
+    shutil.move(tmp_path, path)
+
+
+def compare_file(path):
+    """두 경로의 CSV 내용이 같으면 None, 다르면 차이 설명"""
+    expected = preprocess_excel_with_variable_header(path)
+    chunks = list(iter_excel_chunks(path, chunk_rows=PARITY_CHUNK_ROWS))
+    streamed = pd.concat(chunks, ignore_index=True)
+
+    if list(expected.columns) != list(streamed.columns):
+        return f"컬럼 다름: {list(expected.columns)} / {list(streamed.columns)}"
+    if len(expected) != len(streamed):
+        return f"행 수 다름: {len(expected)} / {len(streamed)}"
+
+    expected_csv = expected.to_csv(index=False)
+    streamed_csv = "".join(c.to_csv(index=False, header=(i == 0)) for i, c in enumerate(chunks))
+    if expected_csv != streamed_csv:
+        diff = next(i for i, (a, b) in enumerate(zip(expected_csv.splitlines(), streamed_csv.splitlines())) if a != b)
+        return f"{diff}번째 줄 다름: {expected_csv.splitlines()[diff]!r} / {streamed_csv.splitlines()[diff]!r}"
+    return None
+
+
+def check_samples():
+    """내장 표본 검사. 반환: 불일치 수"""
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, (rows, dimension) in SAMPLE_SHEETS.items():
+            path = os.path.join(tmp_dir, f"{name}.xlsx")
+            write_sample_xlsx(path, rows, dimension)
+            problem = compare_file(path)
+            if problem:
+                failures += 1
+                print(f"❌ 표본 {name}: {problem}")
+    print(f"[INFO] 내장 표본 {len(SAMPLE_SHEETS)}개 중 불일치 {failures}개")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--xlsx-dir", default=XLSX_DIR)
+    args = parser.parse_args()
+
+    failures = check_samples()
+    xlsx_paths = sorted(glob.glob(os.path.join(args.xlsx_dir, "*.xlsx")))
+    if not xlsx_paths:
+        print(f"[INFO] 엑셀 샘플 없음: {args.xlsx_dir} (내장 표본만 검사)")
+        return 1 if failures else 0
+
+    file_failures = 0
+    for path in xlsx_paths:
+        try:
+            problem = compare_file(path)
+        except Exception as e:
+            problem = f"{type(e).__name__}: {e}"
+        if problem:
+            file_failures += 1
+            print(f"❌ {os.path.basename(path)}: {problem}")
+    print(f"[INFO] 엑셀 샘플 {len(xlsx_paths)}개 중 불일치 {file_failures}개")
+    return 1 if failures or file_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
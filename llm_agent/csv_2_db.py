@@ -1,28 +1,171 @@
 import os
 import glob
+import itertools
+import argparse
 import pandas as pd
 import sqlite3
+from llm_agent.index_advisor import optimize_database
+from llm_agent.table_store import iter_table_chunks
+
+
+# ----------------------------- #
+# 설정
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DB_PATH = os.path.join(BASE_DIR, "data", "database.db")
+CSV_DIR = os.path.join(BASE_DIR, "data", "csv_data")
+CHUNK_SIZE = 50000        # 한 번에 읽고 넣을 행 수
+TYPE_SAMPLE_ROWS = 10000  # 타입 추론에 쓰는 앞부분 행 수
+
+# 적재 중에만 쓰는 PRAGMA (대량 INSERT 속도 우선)
+LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -262144,  # 음수 = KiB 단위 → 약 256MB
+    "temp_store": "MEMORY",
+}
+
+
+# ----------------------------- #
+# 타입 추론
+# ----------------------------- #
+def infer_sqlite_type(series):
+    """pandas Series → SQLite 컬럼 타입 (INTEGER / REAL / TEXT)"""
+    values = series.dropna()
+    if values.empty:
+        return "TEXT"
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(values):
+        # 결측치 때문에 float로 읽힌 정수 컬럼(예: 년도)은 INTEGER로
+        return "INTEGER" if (values == values.round()).all() else "REAL"
+    return "TEXT"
+
+
+def infer_column_types(csv_path, sample_rows=TYPE_SAMPLE_ROWS):
+    """앞부분만 읽어 컬럼별 SQLite 타입을 한 번만 추론 (parquet이 있으면 저장된 타입 사용)"""
+    sample = next(iter_table_chunks(csv_path, sample_rows))
+    return {col: infer_sqlite_type(sample[col]) for col in sample.columns}
+
+
+def _to_rows(chunk, column_types):
+    """청크를 executemany용 튜플 목록으로 변환 (NaN → NULL, 정수 컬럼은 int로)"""
+    chunk = chunk.copy()
+    for col, col_type in column_types.items():
+        if col_type == "INTEGER":
+            try:
+                chunk[col] = chunk[col].astype("Int64")
+            except (TypeError, ValueError):
+                pass  # 뒷부분에 문자열이 섞인 경우 값 그대로 넣음 (SQLite 동적 타입)
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return list(chunk.itertuples(index=False, name=None))
+
+
+# ----------------------------- #
+# 적재
+# ----------------------------- #
+def apply_load_pragmas(conn):
+    for key, value in LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {key} = {value}")
+
+
+def load_table_chunks(conn, table_name, chunks, column_types=None):
+    """
+    DataFrame 청크들을 테이블 하나로 적재 (기존 테이블이 있으면 교체).
+
+    - column_types가 없으면 첫 청크로 추론
+    - 테이블 단위 트랜잭션: 실패하면 기존 테이블이 그대로 남는다.
+    - 반환: 적재한 행 수
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError(f"적재할 데이터가 없습니다: {table_name}")
+    if column_types is None:
+        column_types = {col: infer_sqlite_type(first[col]) for col in first.columns}
+    columns = list(column_types.keys())
+    col_defs = ", ".join(f'"{c}" {t}' for c, t in column_types.items())
+    col_names = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+
+    row_count = 0
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        conn.execute(f'CREATE TABLE "{table_name}" ({col_defs})')
+        insert_sql = f'INSERT INTO "{table_name}" ({col_names}) VALUES ({placeholders})'
+        for chunk in itertools.chain([first], chunks):
+            rows = _to_rows(chunk[columns], column_types)
+            conn.executemany(insert_sql, rows)
+            row_count += len(rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    print(f"[INFO] 테이블 적재 완료: {table_name} ({row_count}행)")
+    return row_count
+
+
+def load_csv_table(conn, csv_path, table_name=None, chunksize=CHUNK_SIZE):
+    """CSV 하나를 테이블 하나로 적재. 반환: 적재한 행 수"""
+    if table_name is None:
+        table_name = os.path.basename(csv_path).replace(".csv", "")
+    column_types = infer_column_types(csv_path)
+    return load_table_chunks(conn, table_name, iter_table_chunks(csv_path, chunksize), column_types)
+
+
+def open_load_connection(db_path=DB_PATH):
+    """적재용 연결 (트랜잭션 직접 관리 + 적재 PRAGMA)"""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    apply_load_pragmas(conn)
+    return conn
+
+
+def finish_load(conn, table_names):
+    """적재 후 동기화 수준 복구 + 인덱스/통계 갱신"""
+    conn.execute("PRAGMA synchronous = NORMAL")
+    optimize_database(conn, table_names)
+
+
+def upsert_tables(csv_paths, db_path=DB_PATH):
+    """지정한 CSV들만 DB에 다시 적재 (DB 전체를 지우지 않음). 적재한 테이블명 목록 반환"""
+    conn = open_load_connection(db_path)
+    try:
+        loaded = []
+        for cp in csv_paths:
+            table_name = os.path.basename(cp).replace(".csv", "")
+            try:
+                load_csv_table(conn, cp, table_name)
+                loaded.append(table_name)
+            except Exception as e:
+                print(f"[ERROR] 테이블 적재 실패: {cp}, 이유: {e}")
+
+        # 자주 쓰이는 필터/정렬 컬럼에 인덱스 생성 + 통계 갱신
+        finish_load(conn, loaded)
+        return loaded
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
-    # DB 경로 설정
-    db_path = "../data/database.db"
+    # 실행: python -m llm_agent.csv_2_db [--rebuild] [--tables 테이블명 ...]
+    parser = argparse.ArgumentParser(description="csv_data → SQLite 적재")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    parser.add_argument("--tables", nargs="*", help="지정한 테이블(CSV 파일명)만 다시 적재")
+    parser.add_argument("--rebuild", action="store_true", help="기존 DB 파일을 지우고 전체 재생성")
+    args = parser.parse_args()
 
     # 기존 DB 파일 삭제 (초기화)
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if args.rebuild and os.path.exists(args.db):
+        os.remove(args.db)
 
     # CSV 파일 목록 수집
-    csv_path = glob.glob(os.path.join("./data/csv_data", "*.csv"))
-
-    # SQLite 연결
-    conn = sqlite3.connect(db_path)
-
-    # 각 CSV 파일을 SQLite에 테이블로 저장
-    for cp in csv_path:
-        file_name = os.path.basename(cp).replace(".csv", "")
-        df = pd.read_csv(cp)
-        df.to_sql(file_name, conn, if_exists="replace", index=False)
+    csv_path = glob.glob(os.path.join(args.csv_dir, "*.csv"))
+    if args.tables:
+        csv_path = [cp for cp in csv_path if os.path.basename(cp).replace(".csv", "") in args.tables]
 
-    # 연결 종료
-    conn.close()
\ No newline at end of file
+    upsert_tables(csv_path, args.db)
@@ -1,18 +1,39 @@
 import os
 import glob
+import argparse
 import re
-import pickle
-import pandas as pd
 import numpy as np
 import faiss
 import torch
+from concurrent.futures import ThreadPoolExecutor
 from transformers import AutoTokenizer, AutoModel
-
-# 설정 경로
-CSV_DIR = os.path.abspath("../data/csv_data")
-FAISS_INDEX_PATH = os.path.abspath("../data/faiss/faiss_index.idx")
-META_PATH = os.path.abspath("../data/faiss/faiss_meta.pkl")
+from llm_agent.table_store import read_schema, read_table
+from llm_agent.meta_store import write_meta_store, store_path_for
+from llm_agent.ngram_index import build_ngram_index, append_ngram_index, ngram_path_for
+from llm_agent.quantize import USE_QUANTIZED, load_quantized_encoder
+from llm_agent.embedding_cache import USE_EMBEDDING_CACHE, get_embedding_cache
+
+# 설정 경로 (실행: python -m llm_agent.embedding)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_DIR = os.path.join(BASE_DIR, "data", "csv_data")
+FAISS_INDEX_PATH = os.path.join(BASE_DIR, "data", "faiss", "faiss_index.idx")
+META_PATH = os.path.join(BASE_DIR, "data", "faiss", "faiss_meta.pkl")
 MODEL_NAME = "nlpai-lab/KURE-v1"
+LOCAL_MODEL_PATH = os.path.join(BASE_DIR, "llm_agent", "KURE-v1")  # 있으면 허브 대신 사용
+
+# FAISS 인덱스 종류: "auto" | "flat" | "ivf_flat" | "ivf_pq" | "hnsw"
+INDEX_TYPE = "auto"
+INDEX_PARAMS = {
+    "nlist": None,           # IVF 클러스터 수 (None이면 4 * sqrt(N))
+    "nprobe": 16,            # IVF 검색 시 탐색할 클러스터 수
+    "pq_m": 64,              # IVF-PQ 서브벡터 수 (차원의 약수여야 함)
+    "pq_nbits": 8,
+    "hnsw_m": 32,
+    "hnsw_ef_construction": 200,
+    "hnsw_ef_search": 128,
+}
+FLAT_MAX_VECTORS = 50_000      # 이하면 정확 검색(Flat)
+HNSW_MAX_VECTORS = 2_000_000   # 이하면 HNSW, 초과하면 IVF-PQ
 
 # 문자열 정규화 함수
 def normalize_token(text):
@@ -21,50 +42,180 @@ def normalize_token(text):
     text = re.sub(r"\s+", "", text)
     return text.strip()
 
+def encoder_model_path():
+    return LOCAL_MODEL_PATH if os.path.isdir(LOCAL_MODEL_PATH) else MODEL_NAME
+
+# 토크나이저/모델 로딩 (로컬 모델 우선)
+# quantized=True(또는 KURE_QUANTIZED=1)면 CPU int8 양자화 모델 사용
+def load_encoder(quantized=USE_QUANTIZED):
+    model_path = encoder_model_path()
+    if quantized:
+        return load_quantized_encoder(model_path)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).to(device)
+    model.eval()
+    return tokenizer, model, device
+
+# SentenceTransformer 안의 HF 토크나이저/모델을 그대로 사용 (같은 KURE-v1 가중치를 두 번 올리지 않도록)
+def encoder_from_sentence_model(st_model):
+    auto_model = st_model._first_module().auto_model
+    return st_model.tokenizer, auto_model, next(auto_model.parameters()).device
+
 # 텍스트 임베딩 함수 (KURE)
+# - 같은 문자열은 한 번만 임베딩 (결과는 입력 순서대로 다시 펼침)
+# - 토큰 길이순으로 정렬해 배치를 만들어 패딩 낭비를 줄임
+# - 토크나이즈는 한 번의 배치 호출 (fast tokenizer가 내부에서 병렬 처리,
+#   같은 토크나이저를 여러 스레드에서 동시에 부르면 "Already borrowed" 오류가 날 수 있음)
+MAX_LENGTH = 128
+READ_WORKERS = min(4, os.cpu_count() or 1)  # CSV 단어 수집 스레드 수
+
+
 @torch.no_grad()
-def encode_texts(texts, tokenizer, model, device, batch_size=32):
-    vecs = []
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        enc = tokenizer(batch, padding=True, truncation=True, return_tensors="pt", max_length=128).to(device)
+def _encode_unique(texts, tokenizer, model, device, batch_size):
+    input_ids = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+
+    order = np.argsort([len(ids) for ids in input_ids], kind="stable")
+    vecs = None
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        enc = tokenizer.pad({"input_ids": [input_ids[i] for i in batch]}, return_tensors="pt").to(device)
         out = model(**enc).last_hidden_state[:, 0]
-        out = torch.nn.functional.normalize(out, dim=1)
-        vecs.append(out.cpu().numpy())
-    return np.vstack(vecs)
+        out = torch.nn.functional.normalize(out, dim=1).cpu().numpy()
+        if vecs is None:
+            vecs = np.zeros((len(texts), out.shape[1]), dtype=np.float32)
+        vecs[batch] = out
+    return vecs
+
+
+# use_cache=True면 디스크 임베딩 캐시(llm_agent/embedding_cache.py)에 없는 문자열만 계산
+def encode_texts(texts, tokenizer, model, device, batch_size=32, use_cache=USE_EMBEDDING_CACHE):
+    unique = list(dict.fromkeys(texts))
+    if not unique:
+        return np.zeros((0, model.config.hidden_size), dtype=np.float32)
+
+    cache = get_embedding_cache(model, "hf-cls") if use_cache else None
+    found = cache.get(unique) if cache else {}
+    missing = [t for t in unique if t not in found]
+    if cache and len(unique) >= 100:
+        print(f"[INFO] 임베딩 캐시: {len(found)}/{len(unique)}개 재사용")
+    if missing:
+        vecs = _encode_unique(missing, tokenizer, model, device, batch_size)
+        if cache:
+            cache.put(missing, vecs)
+        found.update(zip(missing, vecs))
+
+    return np.vstack([found[t] for t in texts]).astype(np.float32)
+
+# 테이블 하나의 검색 대상 단어 수집 (테이블명 + 컬럼명 + 문자열 셀 값)
+def collect_table_words(csv_path):
+    table_name = os.path.basename(csv_path).replace(".csv", "")
+    # 컬럼명과 문자열 컬럼만 필요하므로 나머지 컬럼은 읽지 않음
+    schema = read_schema(csv_path)
+    text_cols = [col for col, kind in schema.items() if kind == "string"]
+    df = read_table(csv_path, columns=text_cols)
+
+    words = set()
+    words.add(table_name)
+    words.update(schema.keys())
+
+    for col in text_cols:
+        values = df[col].dropna().unique().tolist()
+        words.update(str(v) for v in values)
+
+    return table_name, list(words)
 
 # 임베딩 + 메타데이터 생성
+# 모든 파일의 단어를 모아 중복 없이 한 번에 임베딩하고, 벡터는 파일끼리 공유한다
+# ("전주시", "합계", 연도처럼 여러 파일에 나오는 단어를 파일마다 다시 계산하지 않음)
 def embed_csv_files(csv_dir, tokenizer, model, device):
     file_word_embeddings = {}
     file_token_index = {}
 
     csv_files = glob.glob(os.path.join(csv_dir, "*.csv"))
     print("✅ 발견된 CSV 파일 수:", len(csv_files))
-    for csv_path in csv_files:
-        table_name = os.path.basename(csv_path).replace(".csv", "")
-        df = pd.read_csv(csv_path)
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        table_words = list(pool.map(collect_table_words, csv_files))
 
-        norm_name = normalize_token(table_name)
-        file_token_index[table_name] = [norm_name]
+    all_words = list(dict.fromkeys(w for _, words in table_words for w in words))
+    n_total = sum(len(words) for _, words in table_words)
+    print(f"✅ 임베딩 대상 단어: {len(all_words)}개 (파일별 합계 {n_total}개)")
+    vectors = encode_texts(all_words, tokenizer, model, device)
+    position = {w: i for i, w in enumerate(all_words)}
 
-        words = set()
-        words.add(table_name)
-        words.update(df.columns)
+    for table_name, words in table_words:
+        file_token_index[table_name] = [normalize_token(table_name)]
+        file_word_embeddings[table_name] = {w: vectors[position[w]] for w in words}
 
-        text_cols = df.select_dtypes(include='object').columns
-        for col in text_cols:
-            values = df[col].dropna().unique().tolist()
-            words.update(str(v) for v in values)
+    return file_word_embeddings, file_token_index
 
-        words = list(words)
-        embeddings = encode_texts(words, tokenizer, model, device)
-        word_embeddings = {w: emb for w, emb in zip(words, embeddings)}
-        file_word_embeddings[table_name] = word_embeddings
+# 벡터 수에 따라 인덱스 종류 선택
+def select_index_type(n_vectors):
+    if n_vectors <= FLAT_MAX_VECTORS:
+        return "flat"
+    if n_vectors <= HNSW_MAX_VECTORS:
+        return "hnsw"
+    return "ivf_pq"
+
+
+# FAISS 인덱스 생성 (내적 = 정규화 벡터의 코사인 유사도)
+def build_faiss_index(vec_matrix, index_type=INDEX_TYPE, ids=None, **params):
+    """ids를 주면 IndexIDMap2로 감싸서 해당 id로 추가 (증분 추가/삭제용)"""
+    params = {**INDEX_PARAMS, **params}
+    n, d = vec_matrix.shape
+    if index_type == "auto":
+        index_type = select_index_type(n)
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(d)
+
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = params["nlist"] or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))  # 클러스터당 최소 39개 학습 벡터 (faiss 권장)
+        quantizer = faiss.IndexFlatIP(d)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            if d % params["pq_m"] != 0:
+                raise ValueError(f"pq_m({params['pq_m']})은 벡터 차원({d})의 약수여야 합니다.")
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, params["pq_m"], params["pq_nbits"], faiss.METRIC_INNER_PRODUCT)
+        index.train(vec_matrix)
+        index.nprobe = min(params["nprobe"], nlist)
+
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["hnsw_ef_construction"]
+        index.hnsw.efSearch = params["hnsw_ef_search"]
+
+    else:
+        raise ValueError(f"지원하지 않는 인덱스 종류: {index_type}")
+
+    if ids is not None:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vec_matrix, np.asarray(ids, dtype=np.int64))
+    else:
+        index.add(vec_matrix)
+    print(f"✅ FAISS 인덱스 생성: {index_type} (벡터 {n}개, 차원 {d})")
+    return index
+
+
+# 인덱스/메타 원자적 저장 (임시 파일에 쓰고 교체 → 읽는 쪽이 반쯤 쓴 파일을 보지 않음)
+# 메타(faiss_meta.bin)를 먼저 교체: 인덱스에 있는 id는 항상 메타에도 있도록
+# ngram_start: 증분 업데이트에서 새로 추가된 첫 id (주면 그 뒤만 n-gram 세그먼트로 추가)
+def save_index_and_meta(index, meta, faiss_path=FAISS_INDEX_PATH, meta_path=META_PATH, ngram_start=None):
+    os.makedirs(os.path.dirname(faiss_path), exist_ok=True)
+    faiss.write_index(index, faiss_path + ".tmp")
+    write_meta_store(meta, store_path_for(meta_path))
+    # "부분 포함" 검색용 역색인
+    if ngram_start is None:
+        build_ngram_index(meta, ngram_path_for(faiss_path))
+    else:
+        append_ngram_index(meta, ngram_path_for(faiss_path), ngram_start)
+    os.replace(faiss_path + ".tmp", faiss_path)
 
-    return file_word_embeddings, file_token_index
 
 # FAISS 인덱스 및 메타 저장
-def build_and_save_faiss_index(file_word_embeddings, faiss_path, meta_path):
+def build_and_save_faiss_index(file_word_embeddings, faiss_path, meta_path, index_type=INDEX_TYPE, **index_params):
     meta = []
     all_vectors = []
     for file_name, word_dict in file_word_embeddings.items():
@@ -74,24 +225,24 @@ def build_and_save_faiss_index(file_word_embeddings, faiss_path, meta_path):
             meta.append((file_name, word_norm, word_raw))
 
     vec_matrix = np.vstack(all_vectors).astype(np.float32)
-    index = faiss.IndexFlatIP(vec_matrix.shape[1])
-    index.add(vec_matrix)
+    # meta의 위치 = 벡터 id (증분 업데이트 시 같은 id 체계 유지)
+    index = build_faiss_index(vec_matrix, index_type, ids=np.arange(len(meta)), **index_params)
 
-    faiss.write_index(index, faiss_path)
-    with open(meta_path, "wb") as f:
-        pickle.dump(meta, f)
+    save_index_and_meta(index, meta, faiss_path, meta_path)
 
     return index, meta
 
 # 메인 실행
 if __name__ == "__main__":
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModel.from_pretrained(MODEL_NAME).to(device)
-    model.eval()
+    parser = argparse.ArgumentParser(description="csv_data → KURE 임베딩 → FAISS 인덱스")
+    parser.add_argument("--index-type", default=INDEX_TYPE, choices=["auto", "flat", "ivf_flat", "ivf_pq", "hnsw"])
+    parser.add_argument("--quantized", action="store_true", default=USE_QUANTIZED, help="CPU int8 양자화 모델로 임베딩")
+    args = parser.parse_args()
+
+    tokenizer, model, device = load_encoder(args.quantized)
 
     # 1. CSV → 임베딩
     file_word_embeddings, file_token_index = embed_csv_files(CSV_DIR, tokenizer, model, device)
 
     # 2. FAISS 인덱스 생성 및 저장
-    index, meta = build_and_save_faiss_index(file_word_embeddings, FAISS_INDEX_PATH, META_PATH)
+    index, meta = build_and_save_faiss_index(file_word_embeddings, FAISS_INDEX_PATH, META_PATH, args.index_type)
@@ -0,0 +1,162 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import weakref
+import numpy as np
+
+
+# ----------------------------- #
+# 디스크 임베딩 캐시: (모델 이름/리비전, 텍스트 해시) → 벡터
+#
+# data/embedding_cache/
+#   embedding_cache.db   models(model_key, file, dim, n_rows), vectors(model_key, text_hash, row)
+#   <모델 키 해시>.f32   float32 행렬 (행 추가만 함, np.memmap으로 읽음)
+# 쓰기는 SQLite 트랜잭션(BEGIN IMMEDIATE) 안에서 벡터 파일 끝에 덧붙이고 행 번호를 기록하므로
+# 여러 프로세스(서버, streamlit, 배치)가 같은 캐시를 써도 된다.
+# 커밋된 행 번호만 조회되므로 읽는 쪽은 항상 다 쓴 벡터만 본다.
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "data", "embedding_cache")
+DB_NAME = "embedding_cache.db"
+USE_EMBEDDING_CACHE = os.getenv("KURE_EMBEDDING_CACHE", "1") == "1"
+LOOKUP_CHUNK = 500  # SQLite IN (...) 파라미터 수 제한 대응
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+_model_keys = weakref.WeakKeyDictionary()
+
+
+def model_cache_key(model, kind):
+    """
+    kind: 임베딩 방식 구분 ("hf-cls" = embedding.py CLS 벡터, search.py 질의도 이 캐시를 읽기만 함)
+    반환: "kind:모델 경로@리비전[:int8]"
+    """
+    if model in _model_keys:
+        return _model_keys[model]
+    config = getattr(model, "config", None)
+    if config is None and hasattr(model, "_first_module"):
+        config = model._first_module().auto_model.config
+    name = getattr(config, "_name_or_path", "") or type(model).__name__
+    revision = getattr(config, "_commit_hash", None) or "local"
+    quantized = any("quantized" in type(m).__module__ for m in model.modules())
+    key = f"{kind}:{name}@{revision}" + (":int8" if quantized else "")
+    _model_keys[model] = key
+    return key
+
+
+class EmbeddingCache:
+    def __init__(self, model_key, cache_dir=CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.model_key = model_key
+        self.vector_path = os.path.join(cache_dir, hashlib.md5(model_key.encode("utf-8")).hexdigest()[:16] + ".f32")
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._dim = None
+        self.conn = sqlite3.connect(os.path.join(cache_dir, DB_NAME), timeout=30,
+                                    check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS models (
+                model_key TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                n_rows INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS vectors (
+                model_key TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                PRIMARY KEY (model_key, text_hash)
+            ) WITHOUT ROWID
+        """)
+
+    def _rows(self, hashes):
+        rows = {}
+        for i in range(0, len(hashes), LOOKUP_CHUNK):
+            chunk = hashes[i:i + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(self.conn.execute(
+                f"SELECT text_hash, row FROM vectors WHERE model_key = ? AND text_hash IN ({placeholders})",
+                [self.model_key, *chunk],
+            ).fetchall())
+        return rows
+
+    def _open_matrix(self, min_rows):
+        """벡터 파일을 memmap으로 연다. 다른 프로세스가 행을 추가했으면 다시 연다."""
+        if self._matrix is None or len(self._matrix) < min_rows:
+            if self._dim is None:
+                row = self.conn.execute("SELECT dim FROM models WHERE model_key = ?", (self.model_key,)).fetchone()
+                self._dim = row[0]
+            n = os.path.getsize(self.vector_path) // (4 * self._dim)
+            self._matrix = np.memmap(self.vector_path, dtype=np.float32, mode="r", shape=(n, self._dim))
+        return self._matrix
+
+    def get(self, texts):
+        """캐시에 있는 텍스트만 {text: 벡터} 로 반환"""
+        if not texts:
+            return {}
+        with self._lock:
+            hashes = [text_hash(t) for t in texts]
+            rows = self._rows(hashes)
+            if not rows:
+                return {}
+            matrix = self._open_matrix(max(rows.values()) + 1)
+            return {t: np.array(matrix[rows[h]]) for t, h in zip(texts, hashes) if h in rows}
+
+    def put(self, texts, vectors):
+        """새 벡터 추가 (이미 있는 텍스트는 건너뜀)"""
+        if not len(texts):
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")  # 프로세스 간 쓰기 직렬화
+            try:
+                row = self.conn.execute("SELECT dim, n_rows FROM models WHERE model_key = ?", (self.model_key,)).fetchone()
+                if row is None:
+                    dim, n_rows = vectors.shape[1], 0
+                    self.conn.execute("INSERT INTO models VALUES (?, ?, ?, 0)",
+                                      (self.model_key, os.path.basename(self.vector_path), dim))
+                else:
+                    dim, n_rows = row
+
+                hashes = [text_hash(t) for t in texts]
+                existing = self._rows(hashes)
+                first = {}  # 입력 안 중복은 첫 번째만
+                for i, h in enumerate(hashes):
+                    if h not in existing:
+                        first.setdefault(h, i)
+                new = list(first.values())
+                if new:
+                    with open(self.vector_path, "r+b" if os.path.exists(self.vector_path) else "wb") as f:
+                        f.seek(n_rows * dim * 4)
+                        f.write(vectors[new].tobytes())
+                        f.truncate()
+                    self.conn.executemany(
+                        "INSERT INTO vectors VALUES (?, ?, ?)",
+                        [(self.model_key, hashes[i], n_rows + j) for j, i in enumerate(new)],
+                    )
+                    self.conn.execute("UPDATE models SET n_rows = ? WHERE model_key = ?",
+                                      (n_rows + len(new), self.model_key))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model, kind):
+    """모델별 캐시 (프로세스 안에서 하나만 생성)"""
+    key = model_cache_key(model, kind)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(key)
+        return _caches[key]
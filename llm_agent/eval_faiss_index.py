@@ -0,0 +1,75 @@
+import time
+import argparse
+import numpy as np
+import faiss
+
+from llm_agent.embedding import FAISS_INDEX_PATH, build_faiss_index
+
+
+# ----------------------------- #
+# 근사 인덱스 평가: Flat(정확 검색) 대비 recall@k / 검색 지연
+# 실행: python -m llm_agent.eval_faiss_index [--index-types hnsw ivf_flat ivf_pq] [--queries 500]
+# ----------------------------- #
+def load_vectors(index_path=FAISS_INDEX_PATH):
+    """저장된 인덱스에서 벡터 복원 (PQ 인덱스는 근사 벡터가 복원됨)"""
+    index = faiss.read_index(index_path)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)  # id 매핑 없이 내부 인덱스 순서대로 복원
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()  # IVF 계열은 direct map이 있어야 복원 가능
+    except RuntimeError:
+        pass
+    return index.reconstruct_n(0, index.ntotal).astype(np.float32)
+
+
+def sample_queries(vectors, n_queries, noise=0.05, seed=0):
+    """저장된 벡터에 약간의 잡음을 더해 질의 벡터 생성 (입력 오타/변형 흉내)"""
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)]
+    queries = picked + rng.normal(scale=noise, size=picked.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def timed_search(index, queries, k):
+    start = time.perf_counter()
+    _, I = index.search(queries, k)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return I, elapsed_ms
+
+
+def recall_at_k(ground_truth, result):
+    hits = sum(len(set(gt) & set(res)) for gt, res in zip(ground_truth, result))
+    return hits / ground_truth.size
+
+
+def evaluate(vectors, index_types, n_queries=500, k=10):
+    queries = sample_queries(vectors, n_queries)
+
+    flat = build_faiss_index(vectors, "flat")
+    ground_truth, flat_ms = timed_search(flat, queries, k)
+    rows = [("flat", 1.0, flat_ms, 0.0)]
+
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = build_faiss_index(vectors, index_type)
+        build_s = time.perf_counter() - start
+        result, ms = timed_search(index, queries, k)
+        rows.append((index_type, recall_at_k(ground_truth, result), ms, build_s))
+
+    print(f"\n벡터 {len(vectors)}개, 질의 {len(queries)}개, k={k}")
+    print(f"{'index':<10} {'recall@k':>10} {'ms/query':>10} {'build(s)':>10}")
+    for index_type, recall, ms, build_s in rows:
+        print(f"{index_type:<10} {recall:>10.4f} {ms:>10.3f} {build_s:>10.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS 근사 인덱스 recall/지연 평가")
+    parser.add_argument("--index-path", default=FAISS_INDEX_PATH)
+    parser.add_argument("--index-types", nargs="+", default=["hnsw", "ivf_flat", "ivf_pq"])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    evaluate(load_vectors(args.index_path), args.index_types, args.queries, args.k)
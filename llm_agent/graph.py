@@ -8,10 +8,17 @@ import matplotlib.font_manager as fm
 from io import StringIO
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from llm_agent.chart_pool import get_render_pool, reset_render_pool, render_rule_chart
+from llm_agent.plot_sandbox import run_plot_code
+from llm_agent import chart_store
 
 plt.rcParams["font.family"] = 'NanumGothic'
 plt.rcParams['axes.unicode_minus'] = False
 
+LLM_WORKERS = 4          # 동시에 보내는 LLM 요청 수
+
 llm = ChatOpenAI(
     base_url="",
     api_key="not-needed",
@@ -441,45 +448,101 @@ def ensure_save_and_show(code_str: str, name: str = None, directory: str = "./da
     return code_str.strip(), full_path
 
 
-def run_graph_generation(df_table, table_name):
-    print(f"[graph.py] start, {df_table}, {table_name}")
+# 생성된 코드를 샌드박스에서 실행해 차트 저장소에 저장 → 키 반환
+# (코드, 표 내용)이 같으면 실행하지 않고 저장된 PNG 사용
+def render_llm_code(code, df):
+    key = chart_store.chart_key(df, {"renderer": "llm_code", "code": chart_store.text_digest(code)})
+    if chart_store.lookup(key):
+        print(f"[graph.py] 저장된 그래프 사용: {key}")
+        return key
+    final_code, tmp_path = ensure_save_and_show(code, chart_store.tmp_name(key), directory=chart_store.STORE_DIR)
+    run_plot_code(final_code, df)
+    if not os.path.exists(tmp_path):
+        raise ValueError("⚠️ 그래프 파일이 생성되지 않았습니다.")
+    chart_store.commit(key, tmp_path)
+    print(final_code)
+    return key
+
+
+# LLM이 생성한 코드로 그리기 (규칙 기반으로 그릴 수 없을 때만 사용) → 차트 저장소 키
+# (표 내용, 주제, 프롬프트)가 같은 요청이 전에 성공했으면 LLM을 부르지 않는다
+def generate_with_llm(df_table, i, table_name):
     MAX_RETRIES = 3
+    query = table_name[i]
+    request_key = chart_store.chart_key(df_table[i], {
+        "renderer": "llm", "subject": query, "prompt": chart_store.text_digest(design_prompt),
+    })
+    if chart_store.lookup(request_key):
+        print(f"[graph.py] [표 {i+1}] 저장된 그래프 사용: {request_key}")
+        return request_key
+
+    agent = create_pandas_dataframe_agent(
+        llm,
+        df_table[i],
+        verbose=False,
+        allow_dangerous_code=True
+    )
+    full_query = design_prompt.strip() + "\n\n" + f"subject of the chart: {query}"
+
+    attempt = 0
+    while attempt < MAX_RETRIES:
+        try:
+            query_response = agent.invoke(full_query)
+
+            # 코드 추출
+            code = extract_clean_code(query_response["output"], df_assign_code="df = df_table[i]").strip()
+
+            if not code or "import" not in code:
+                raise ValueError("⚠️ 코드 블록이 출력에 포함되지 않았습니다.")
+
+            key = render_llm_code(code, df_table[i])
+            chart_store.alias(key, request_key)
+            print(f"[그래프 {i+1}] 저장 완료: {key}")
+            return key
+
+        except Exception as e:
+            attempt += 1
+            print(f"⚠️ [표 {i+1}] 시도 {attempt} 실패: {e}")
+    print(f"❌ [표 {i+1}] 그래프 생성 실패: {query}")
+    return None
+
+
+# 표마다 (i, 차트 저장소 키 또는 None)를 끝나는 순서대로 반환
+#   1) 모든 표를 규칙 기반 렌더링으로 프로세스 풀에 동시에 제출
+#   2) 규칙으로 그릴 수 없는 표만 LLM 스레드 풀로 넘김 (LLM 요청도 동시에)
+# PNG 경로는 chart_store.store_path(key), 서버 주소는 /static/graph/<key>.png
+def iter_graph_generation(df_table, table_name):
+    pool = get_render_pool()
+
+    with ThreadPoolExecutor(max_workers=LLM_WORKERS) as llm_pool:
+        pending = {
+            pool.submit(render_rule_chart, df_table[i], table_name[i]): ("rule", i)
+            for i in range(len(table_name))
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, i = pending.pop(future)
+                try:
+                    key = future.result()
+                except BrokenProcessPool as e:
+                    reset_render_pool()
+                    print(f"⚠️ [표 {i+1}] 렌더링 프로세스 오류: {e}")
+                    key = None
+                except Exception as e:
+                    print(f"⚠️ [표 {i+1}] 규칙 기반 차트 실패: {e}")
+                    key = None
+
+                if kind == "rule" and key is None:
+                    print(f"[graph.py] [표 {i+1}] LLM 코드 생성으로 전환")
+                    pending[llm_pool.submit(generate_with_llm, df_table, i, table_name)] = ("llm", i)
+                    continue
+                yield i, key
 
-    for i in range(len(table_name)):
-        agent = create_pandas_dataframe_agent(
-            llm,
-            df_table[i],
-            verbose=False,
-            allow_dangerous_code=True
-        )
-
-        query = table_name[i]
-        full_query = design_prompt.strip() + "\n\n" + f"subject of the chart: {query}"
-
-        attempt = 0
-        success = False
-
-        while attempt < MAX_RETRIES and not success:
-            try:
-                query_response = agent.invoke(full_query)
 
-                # 코드 추출
-                code = extract_clean_code(query_response["output"], df_assign_code="df = df_table[i]").strip()
-
-                if not code or "import" not in code:
-                    raise ValueError("⚠️ 코드 블록이 출력에 포함되지 않았습니다.")
-
-                # 저장 및 show 조치 포함한 코드 생성
-                final_code, path = ensure_save_and_show(code, table_name[i], directory=os.path.abspath("./graph"))
-
-                # 실행
-                exec(final_code)
-                print(f"[그래프 {i+1}] 저장 완료: {path}")
-                print(final_code)
-                success = True
-
-            except Exception as e:
-                attempt += 1
-                print(f"⚠️ [표 {i+1}] 시도 {attempt} 실패: {e}")
-                if attempt >= MAX_RETRIES:
-                    print(f"❌ [표 {i+1}] 그래프 생성 실패: {query}")
\ No newline at end of file
+def run_graph_generation(df_table, table_name):
+    print(f"[graph.py] start, {df_table}, {table_name}")
+    keys = [None] * len(table_name)
+    for i, key in iter_graph_generation(df_table, table_name):
+        keys[i] = key
+    return keys
@@ -0,0 +1,235 @@
+import os
+import re
+import sqlite3
+import hashlib
+from datetime import datetime
+
+
+# ----------------------------- #
+# 설정
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 분석 DB(database.db)는 csv_2_db 실행 시 삭제되므로 로그는 별도 파일에 보관
+ADVISOR_DB_PATH = os.path.join(BASE_DIR, "data", "index_advisor.db")
+MAX_INDEX_COLUMNS = 6       # 커버링 인덱스에 넣을 최대 컬럼 수
+MAX_INDEXES_PER_TABLE = 3
+LOW_CARDINALITY_RATIO = 0.05  # 로그가 없을 때 카테고리형 컬럼으로 볼 고유값 비율
+
+CLAUSE_PATTERNS = {
+    "where": r"\bWHERE\b(.*?)(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|;|$)",
+    "group_by": r"\bGROUP\s+BY\b(.*?)(?=\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|;|$)",
+    "order_by": r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|;|$)",
+    "select": r"\bSELECT\b(.*?)(?=\bFROM\b)",
+}
+
+
+def _connect_log(log_path=ADVISOR_DB_PATH):
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    conn = sqlite3.connect(log_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS column_usage (
+            table_name TEXT, column_name TEXT, clause TEXT,
+            hits INTEGER DEFAULT 0, last_used TEXT,
+            PRIMARY KEY (table_name, column_name, clause)
+        )""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_log (
+            sql_hash TEXT PRIMARY KEY, table_name TEXT, sql TEXT,
+            hits INTEGER DEFAULT 0, last_used TEXT
+        )""")
+    return conn
+
+
+# ----------------------------- #
+# 쿼리 분석
+# ----------------------------- #
+def extract_query_columns(sql):
+    """
+    SELECT 문에서 테이블명과 절(clause)별 사용 컬럼 추출.
+
+    - 반환: (테이블명 또는 None, {"where": [...], "group_by": [...], "order_by": [...], "select": [...]})
+    """
+    table = re.search(r'\bFROM\s+"([^"]+)"|\bFROM\s+([^\s;"]+)', sql, flags=re.IGNORECASE)
+    table_name = (table.group(1) or table.group(2)) if table else None
+
+    # 문자열 리터럴 제거 후 절별 따옴표 식별자 수집
+    body = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    aliases = set(re.findall(r'\bAS\s+"([^"]+)"', body, flags=re.IGNORECASE))
+    columns = {}
+    for clause, pattern in CLAUSE_PATTERNS.items():
+        m = re.search(pattern, body, flags=re.IGNORECASE | re.DOTALL)
+        found = re.findall(r'"([^"]+)"', m.group(1)) if m else []
+        columns[clause] = [c for c in dict.fromkeys(found) if c not in aliases]
+    return table_name, columns
+
+
+def plan_uses_index(conn, sql):
+    """EXPLAIN QUERY PLAN 결과에 인덱스 사용이 있으면 True"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}").fetchall()
+    detail = " ".join(str(r[-1]) for r in rows)
+    return "USING INDEX" in detail or "USING COVERING INDEX" in detail
+
+
+# ----------------------------- #
+# 실행 쿼리 기록
+# ----------------------------- #
+def log_query(sql, log_path=ADVISOR_DB_PATH):
+    """
+    실행된 쿼리의 WHERE/GROUP BY/ORDER BY/SELECT 컬럼과 쿼리 문장 기록.
+    인덱스 사용 여부(EXPLAIN QUERY PLAN)는 요청 경로에서 확인하지 않고 index_hit_report에서 한꺼번에 확인
+    """
+    table_name, columns = extract_query_columns(sql)
+    if not table_name:
+        return
+
+    sql_hash = hashlib.md5(sql.strip().encode("utf-8")).hexdigest()
+    now = datetime.now().isoformat(timespec="seconds")
+    conn = _connect_log(log_path)
+    try:
+        with conn:
+            for clause, cols in columns.items():
+                for col in cols:
+                    conn.execute("""
+                        INSERT INTO column_usage (table_name, column_name, clause, hits, last_used)
+                        VALUES (?, ?, ?, 1, ?)
+                        ON CONFLICT(table_name, column_name, clause)
+                        DO UPDATE SET hits = hits + 1, last_used = excluded.last_used
+                    """, (table_name, col, clause, now))
+            conn.execute("""
+                INSERT INTO query_log (sql_hash, table_name, sql, hits, last_used) VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(sql_hash) DO UPDATE SET hits = hits + 1, last_used = excluded.last_used
+            """, (sql_hash, table_name, sql.strip(), now))
+    finally:
+        conn.close()
+
+
+# ----------------------------- #
+# 인덱스 추천 및 생성
+# ----------------------------- #
+def _hot_columns(table_name, existing_columns, log_path):
+    """로그 기반으로 (필터 컬럼, 정렬/그룹 컬럼, 조회 컬럼)을 사용 빈도순으로 반환"""
+    if not os.path.exists(log_path):
+        return [], [], []
+    conn = _connect_log(log_path)
+    try:
+        rows = conn.execute(
+            "SELECT column_name, clause, hits FROM column_usage WHERE table_name = ? ORDER BY hits DESC",
+            (table_name,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    where_cols, sort_cols, select_cols = [], [], []
+    for col, clause, _ in rows:
+        if col not in existing_columns:
+            continue
+        if clause == "where":
+            where_cols.append(col)
+        elif clause in ("group_by", "order_by"):
+            sort_cols.append(col)
+        else:
+            select_cols.append(col)
+    return where_cols, list(dict.fromkeys(sort_cols)), select_cols
+
+
+def _low_cardinality_columns(conn, table_name, columns):
+    """로그가 없을 때: 고유값 비율이 낮은 TEXT 컬럼(예: "구분")을 필터 후보로 사용"""
+    total = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+    if total == 0:
+        return []
+    candidates = []
+    for col, col_type in columns:
+        if col_type.upper() != "TEXT":
+            continue
+        distinct = conn.execute(f'SELECT COUNT(DISTINCT "{col}") FROM "{table_name}"').fetchone()[0]
+        if distinct / total <= LOW_CARDINALITY_RATIO or distinct <= 20:
+            candidates.append((distinct, col))
+    return [col for _, col in sorted(candidates)]
+
+
+def advise_indexes(conn, table_name, log_path=ADVISOR_DB_PATH):
+    """테이블에 만들 인덱스 컬럼 조합 목록 반환"""
+    columns = [(row[1], row[2] or "") for row in conn.execute(f"PRAGMA table_info('{table_name}')")]
+    names = [c for c, _ in columns]
+
+    where_cols, sort_cols, select_cols = _hot_columns(table_name, names, log_path)
+    if not where_cols and not sort_cols:
+        where_cols = _low_cardinality_columns(conn, table_name, columns)[:2]
+
+    advised = []
+    # 1. 필터 + 정렬/그룹 컬럼 (+ 자주 조회되는 컬럼까지 넣어 커버링 인덱스로)
+    key = list(dict.fromkeys(where_cols[:2] + sort_cols[:2]))
+    if key:
+        covering = list(dict.fromkeys(key + select_cols))[:MAX_INDEX_COLUMNS]
+        advised.append(covering)
+    # 2. 단독 필터 컬럼
+    for col in where_cols[:MAX_INDEXES_PER_TABLE]:
+        if [col] not in advised and (not advised or advised[0][0] != col):
+            advised.append([col])
+
+    return advised[:MAX_INDEXES_PER_TABLE]
+
+
+def create_advised_indexes(conn, table_name, log_path=ADVISOR_DB_PATH):
+    """추천 인덱스 생성 후 생성된 인덱스 이름 목록 반환"""
+    created = []
+    for cols in advise_indexes(conn, table_name, log_path):
+        digest = hashlib.md5("|".join([table_name] + cols).encode("utf-8")).hexdigest()[:10]
+        index_name = f"idx_auto_{digest}"
+        col_sql = ", ".join(f'"{c}"' for c in cols)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({col_sql})')
+        created.append(index_name)
+        print(f"[INFO] 인덱스 생성: {table_name} ({', '.join(cols)})")
+    return created
+
+
+def optimize_database(conn, table_names, log_path=ADVISOR_DB_PATH):
+    """적재 직후 호출: 적재한 테이블만 추천 인덱스 생성 + ANALYZE"""
+    for table_name in table_names:
+        try:
+            create_advised_indexes(conn, table_name, log_path)
+            conn.execute(f'ANALYZE "{table_name}"')
+        except sqlite3.Error as e:
+            print(f"⚠️ 인덱스 생성 실패: {table_name}, 이유: {e}")
+    conn.commit()
+
+
+# ----------------------------- #
+# 보고
+# ----------------------------- #
+def index_hit_report(db_path, log_path=ADVISOR_DB_PATH):
+    """
+    기록된 쿼리를 현재 DB에서 EXPLAIN QUERY PLAN으로 확인 (실행 횟수 가중).
+    반환: [(테이블명, 인덱스 사용 횟수, 전체 스캔 횟수, 사용률), ...]
+    """
+    if not os.path.exists(log_path):
+        return []
+    conn = _connect_log(log_path)
+    try:
+        rows = conn.execute("SELECT table_name, sql, hits FROM query_log").fetchall()
+    finally:
+        conn.close()
+
+    usage = {}
+    db_conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for table_name, sql, hits in rows:
+            try:
+                used_index = plan_uses_index(db_conn, sql)
+            except sqlite3.Error:
+                continue  # 테이블/컬럼이 바뀌어 더 이상 실행할 수 없는 쿼리
+            index_hits, scans = usage.get(table_name, (0, 0))
+            usage[table_name] = (index_hits + hits * used_index, scans + hits * (not used_index))
+    finally:
+        db_conn.close()
+    return [(t, hits, scans, hits / (hits + scans) if hits + scans else 0.0)
+            for t, (hits, scans) in sorted(usage.items())]
+
+
+if __name__ == "__main__":
+    # 실행: python -m llm_agent.index_advisor [DB 경로]
+    import sys
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, "data", "database.db")
+    for table_name, hits, scans, rate in index_hit_report(db_path):
+        print(f"{table_name}: 인덱스 {hits}회 / 전체 스캔 {scans}회 (사용률 {rate:.1%})")
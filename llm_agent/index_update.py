@@ -0,0 +1,123 @@
+import os
+import threading
+import numpy as np
+import faiss
+
+from llm_agent.embedding import (
+    FAISS_INDEX_PATH, META_PATH, normalize_token, encode_texts, encoder_from_sentence_model,
+    collect_table_words, build_faiss_index, save_index_and_meta,
+)
+from llm_agent.meta_store import load_meta, meta_exists, MetaStore
+from llm_agent.search import get_sentence_model
+
+
+# ----------------------------- #
+# 업로드된 테이블만 FAISS 인덱스에 반영 (전체 재임베딩 없이)
+#   - 벡터 id = meta 리스트 위치
+#   - 삭제된 항목은 meta에서 None으로 남겨 id 체계를 유지
+#   - 삭제를 지원하지 않는 인덱스(HNSW)에 남은 벡터가 MAX_DEAD_RATIO를 넘으면 남은 벡터로 다시 구성
+# ----------------------------- #
+MAX_DEAD_RATIO = 0.05  # 전체 벡터 중 meta가 비어 있는(검색에 안 쓰이는) 벡터 비율 상한
+_update_lock = threading.Lock()
+
+
+def _get_encoder():
+    """검색/SQL 캐시와 같은 SentenceTransformer의 토크나이저/모델 사용 (모델을 따로 올리지 않음)"""
+    return encoder_from_sentence_model(get_sentence_model())
+
+
+def ensure_id_map(index, meta):
+    """id 매핑이 없는 예전 인덱스는 벡터를 복원해 IndexIDMap2로 다시 만든다"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return index
+    print("[INFO] 기존 FAISS 인덱스를 IndexIDMap2로 변환합니다.")
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass
+    vectors = index.reconstruct_n(0, index.ntotal).astype(np.float32)
+    alive = [i for i, m in enumerate(meta) if m is not None and i < len(vectors)]
+    return build_faiss_index(vectors[alive], ids=np.array(alive, dtype=np.int64))
+
+
+def load_index_and_meta(faiss_path=FAISS_INDEX_PATH, meta_path=META_PATH):
+    if not os.path.exists(faiss_path) or not meta_exists(meta_path):
+        return None, []
+    index = faiss.read_index(faiss_path)
+    meta = load_meta(meta_path)
+    if isinstance(meta, MetaStore):
+        meta = meta.to_list()  # 수정 가능한 리스트로
+    return ensure_id_map(index, meta), meta
+
+
+def _remove_table(index, meta, table_name):
+    """table_name의 벡터 삭제. 삭제된 개수 반환"""
+    ids = [i for i, m in enumerate(meta) if m is not None and m[0] == table_name]
+    if not ids:
+        return 0
+    try:
+        index.remove_ids(np.array(ids, dtype=np.int64))
+    except RuntimeError:
+        # HNSW 등 삭제를 지원하지 않는 인덱스: meta만 비워서 검색 결과에서 제외
+        print(f"⚠️ 인덱스에서 벡터를 삭제할 수 없어 메타데이터만 제거합니다: {table_name}")
+    for i in ids:
+        meta[i] = None
+    return len(ids)
+
+
+def compact_index(index, meta, max_dead_ratio=MAX_DEAD_RATIO):
+    """
+    meta가 None인데 인덱스에 남아 있는 벡터가 많으면 남은 벡터만으로 인덱스를 다시 만든다.
+    (삭제를 지원하지 않는 인덱스에서 죽은 벡터가 top-k 자리를 차지하지 않도록)
+    """
+    alive = sum(m is not None for m in meta)
+    dead = index.ntotal - alive
+    if dead <= 0 or dead / index.ntotal < max_dead_ratio:
+        return index
+
+    inner = faiss.downcast_index(index.index)
+    vectors = inner.reconstruct_n(0, inner.ntotal).astype(np.float32)
+    ids = faiss.vector_to_array(index.id_map).astype(np.int64)  # 내부 순서 → 벡터 id
+    keep = np.array([meta[i] is not None for i in ids], dtype=bool)
+    print(f"[INFO] FAISS 인덱스 재구성: 죽은 벡터 {dead}개 제거 (남은 벡터 {int(keep.sum())}개)")
+    return build_faiss_index(vectors[keep], ids=ids[keep])
+
+
+def update_index_for_table(csv_path, faiss_path=FAISS_INDEX_PATH, meta_path=META_PATH):
+    """
+    CSV 하나의 단어만 임베딩해 인덱스에 추가.
+    같은 테이블의 기존 벡터는 먼저 삭제한다 (파일 재업로드 대응).
+    """
+    with _update_lock:
+        table_name, words = collect_table_words(csv_path)
+        tokenizer, model, device = _get_encoder()
+        vectors = encode_texts(words, tokenizer, model, device).astype(np.float32)
+
+        index, meta = load_index_and_meta(faiss_path, meta_path)
+        removed = 0
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+        else:
+            removed = _remove_table(index, meta, table_name)
+
+        ngram_start = len(meta)
+        new_ids = np.arange(len(meta), len(meta) + len(words), dtype=np.int64)
+        index.add_with_ids(vectors, new_ids)
+        meta.extend((table_name, normalize_token(w), w) for w in words)
+        index = compact_index(index, meta)
+
+        save_index_and_meta(index, meta, faiss_path, meta_path, ngram_start=ngram_start)
+        print(f"[INFO] FAISS 증분 업데이트: {table_name} (추가 {len(words)}개, 삭제 {removed}개)")
+        return len(words)
+
+
+def remove_table_from_index(table_name, faiss_path=FAISS_INDEX_PATH, meta_path=META_PATH):
+    with _update_lock:
+        index, meta = load_index_and_meta(faiss_path, meta_path)
+        if index is None:
+            return 0
+        removed = _remove_table(index, meta, table_name)
+        if removed:
+            index = compact_index(index, meta)
+            save_index_and_meta(index, meta, faiss_path, meta_path, ngram_start=len(meta))
+        return removed
@@ -0,0 +1,144 @@
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+
+from llm_agent.preprocess import preprocess_run
+from llm_agent.csv_2_db import DB_PATH
+
+
+# ----------------------------- #
+# 업로드 적재 작업 (백그라운드)
+#   /upload 는 파일 저장 후 작업 id만 돌려주고, 전처리 → SQLite 적재 → 검색 인덱스 반영은 작업자 스레드가 수행
+#   상태는 프로세스 메모리에 보관 (서버 재시작 시 사라짐) → GET /upload/<id>, /upload/<id>/events 로 조회
+# ----------------------------- #
+MAX_FINISHED_JOBS = 200  # 완료/실패 작업 상태를 보관하는 개수
+INGEST_THREADS = 1       # 인덱스 갱신은 어차피 잠금으로 직렬화되므로 하나로 충분
+
+_jobs = OrderedDict()
+_jobs_cond = threading.Condition()
+_queue = queue.Queue()
+_threads = []
+
+
+def _update(job_id, **fields):
+    with _jobs_cond:
+        job = _jobs[job_id]
+        job.update(fields, updated_at=time.time(), version=job["version"] + 1)
+        _jobs_cond.notify_all()
+
+
+def _forget_old_jobs():
+    finished = [jid for jid, job in _jobs.items() if job["status"] in ("done", "failed")]
+    for jid in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[jid]
+
+
+def _run_job(job_id, target, args):
+    def progress(stage, message, ratio):
+        _update(job_id, stage=stage, message=message, progress=ratio)
+
+    _update(job_id, status="running", started_at=time.time())
+    try:
+        result = target(*args, progress=progress)
+        _update(job_id, status="done", stage="done", message="완료", progress=1.0, result=result)
+    except Exception as e:
+        print(f"[ERROR] 적재 작업 실패: {job_id}, 이유: {e}")
+        _update(job_id, status="failed", message="실패", error=f"{type(e).__name__}: {e}")
+
+
+def _worker_loop():
+    while True:
+        job_id, target, args = _queue.get()
+        try:
+            _run_job(job_id, target, args)
+        finally:
+            _queue.task_done()
+
+
+def start_workers():
+    with _jobs_cond:
+        while len(_threads) < INGEST_THREADS:
+            t = threading.Thread(target=_worker_loop, name=f"ingest-{len(_threads)}", daemon=True)
+            t.start()
+            _threads.append(t)
+
+
+def submit_job(kind, target, *args, **info):
+    """target(*args, progress=콜백) 을 백그라운드에서 실행. 반환: 작업 id"""
+    start_workers()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _jobs_cond:
+        _forget_old_jobs()
+        _jobs[job_id] = {
+            "id": job_id, "kind": kind, "status": "queued", "stage": "queued", "message": "대기 중",
+            "progress": 0.0, "result": None, "error": None,
+            "created_at": now, "updated_at": now, "version": 0, **info,
+        }
+    _queue.put((job_id, target, args))
+    return job_id
+
+
+def get_job(job_id):
+    with _jobs_cond:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+def iter_job_updates(job_id, timeout=15.0):
+    """
+    상태가 바뀔 때마다 작업 dict 반환 (완료/실패 시 종료).
+    timeout 동안 변화가 없으면 같은 상태를 다시 반환 (SSE 연결 유지용)
+    """
+    version = -1
+    while True:
+        with _jobs_cond:
+            _jobs_cond.wait_for(lambda: job_id not in _jobs or _jobs[job_id]["version"] != version, timeout)
+            job = _jobs.get(job_id)
+            if job is None:
+                return
+            job = dict(job)
+        version = job["version"]
+        yield job
+        if job["status"] in ("done", "failed"):
+            return
+
+
+# ----------------------------- #
+# 작업 종류
+# ----------------------------- #
+def ingest_upload(file_path, progress, db_path=DB_PATH):
+    """업로드 파일 하나: 전처리(+SQLite 적재) → 검색 인덱스 반영"""
+    from llm_agent.index_update import update_index_for_table  # 임베딩 모델은 작업자에서 처음 쓸 때 로딩
+
+    progress("preprocess", "전처리 및 DB 적재 중", 0.1)
+    csv_path = preprocess_run(file_path, db_path=db_path)
+
+    progress("index", "검색 인덱스 반영 중", 0.6)
+    try:
+        update_index_for_table(csv_path)
+        index_error = None
+    except Exception as e:
+        # 인덱스 반영 실패해도 테이블은 조회 가능 (기존 /upload 와 같은 처리)
+        print(f"⚠️ 검색 인덱스 업데이트 실패: {e}")
+        index_error = str(e)
+
+    return {"csv_path": csv_path, "table": os.path.splitext(os.path.basename(csv_path))[0],
+            "index_error": index_error}
+
+
+def ingest_bulk(file_paths, progress, db_path=DB_PATH):
+    """여러 엑셀 파일: 시트가 끝날 때마다 진행률 갱신"""
+    from llm_agent.bulk_ingest import ingest_workbooks
+
+    def on_result(result, n_done, total):
+        if n_done < total:
+            progress("preprocess", f"시트 전처리 {n_done}/{total}", 0.8 * n_done / total)
+        else:
+            progress("load", "DB 적재 및 검색 인덱스 반영 중", 0.8)
+
+    progress("preprocess", "시트 전처리 중", 0.0)
+    return ingest_workbooks(file_paths, db_path=db_path, update_index=True, on_result=on_result)
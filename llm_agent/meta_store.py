@@ -0,0 +1,162 @@
+import os
+import json
+import pickle
+import numpy as np
+
+
+# ----------------------------- #
+# FAISS 메타데이터 저장소 (faiss_meta.pkl 대체)
+#
+# 파일 하나에 배열을 이어 붙여 저장하고 np.memmap으로 연다.
+#   [MAGIC 8B][헤더 길이 8B][헤더 JSON][file_ids int32][norm 오프셋 int64][raw 오프셋 int64][norm UTF-8][raw UTF-8]
+# - file_ids: 파일명 목록(헤더)의 번호, 삭제된 항목은 -1
+# - 문자열은 오프셋으로 잘라 필요할 때만 디코딩
+# 페이지는 OS 페이지 캐시를 통해 여러 프로세스가 공유한다.
+# ----------------------------- #
+MAGIC = b"KMETA1\0\0"
+ALIGN = 8
+
+
+def _pad(n):
+    return (-n) % ALIGN
+
+
+def _encode_strings(strings):
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return offsets, b"".join(blobs)
+
+
+def write_meta_store(meta, path):
+    """
+    meta: [(file_name, word_norm, word_raw) 또는 None, ...] → 단일 바이너리 파일 (원자적 교체)
+    """
+    files = []
+    file_index = {}
+    file_ids = np.full(len(meta), -1, dtype=np.int32)
+    norms, raws = [], []
+    for i, m in enumerate(meta):
+        if m is None:
+            norms.append("")
+            raws.append("")
+            continue
+        file_name, word_norm, word_raw = m
+        if file_name not in file_index:
+            file_index[file_name] = len(files)
+            files.append(file_name)
+        file_ids[i] = file_index[file_name]
+        norms.append(word_norm)
+        raws.append(word_raw)
+
+    norm_off, norm_blob = _encode_strings(norms)
+    raw_off, raw_blob = _encode_strings(raws)
+
+    sections = [file_ids.tobytes(), norm_off.tobytes(), raw_off.tobytes(), norm_blob, raw_blob]
+    names = ["file_ids", "norm_off", "raw_off", "norm_blob", "raw_blob"]
+
+    # 헤더 길이가 섹션 오프셋에 영향을 주므로 오프셋은 헤더 뒤 기준 상대값으로 기록
+    layout, pos = {}, 0
+    for name, data in zip(names, sections):
+        layout[name] = [pos, len(data)]
+        pos += len(data) + _pad(len(data))
+    header = json.dumps({"n": len(meta), "files": files, "layout": layout}, ensure_ascii=False).encode("utf-8")
+    header += b" " * _pad(len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for data in sections:
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(tmp_path, path)
+
+
+class MetaStore:
+    """memmap 기반 메타데이터. list처럼 meta[i] → (file_name, word_norm, word_raw) 또는 None"""
+
+    def __init__(self, path):
+        self.path = path
+        self._buf = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._buf[:8]) != MAGIC:
+            raise ValueError(f"메타데이터 파일 형식이 아닙니다: {path}")
+        header_len = int(self._buf[8:16].view(np.uint64)[0])
+        header = json.loads(bytes(self._buf[16:16 + header_len]).decode("utf-8"))
+        base = 16 + header_len
+
+        def section(name, dtype):
+            start, size = header["layout"][name]
+            return self._buf[base + start:base + start + size].view(dtype)
+
+        self.n = header["n"]
+        self.files = header["files"]
+        self.file_ids = section("file_ids", np.int32)
+        self._norm_off = section("norm_off", np.int64)
+        self._raw_off = section("raw_off", np.int64)
+        self._norm_blob = section("norm_blob", np.uint8)
+        self._raw_blob = section("raw_blob", np.uint8)
+
+    def __len__(self):
+        return self.n
+
+    def _string(self, blob, offsets, i):
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        fid = int(self.file_ids[i])
+        if fid < 0:
+            return None
+        return (
+            self.files[fid],
+            self._string(self._norm_blob, self._norm_off, i),
+            self._string(self._raw_blob, self._raw_off, i),
+        )
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def alive_files(self):
+        """삭제되지 않은 항목이 하나라도 있는 파일명 목록"""
+        ids = np.unique(self.file_ids[self.file_ids >= 0])
+        return [self.files[i] for i in ids]
+
+    def ids_for_file(self, file_name):
+        if file_name not in self.files:
+            return np.array([], dtype=np.int64)
+        return np.nonzero(self.file_ids == self.files.index(file_name))[0].astype(np.int64)
+
+    def to_list(self):
+        """수정용 파이썬 리스트로 변환 (증분 업데이트 시 사용)"""
+        return list(self)
+
+
+def store_path_for(meta_path):
+    """faiss_meta.pkl → faiss_meta.bin"""
+    return os.path.splitext(meta_path)[0] + ".bin"
+
+
+def meta_files(meta):
+    """삭제되지 않은 항목이 있는 파일명 목록 (MetaStore / 리스트 공통)"""
+    if isinstance(meta, MetaStore):
+        return meta.alive_files()
+    return list(dict.fromkeys(m[0] for m in meta if m is not None))
+
+
+def meta_exists(meta_path):
+    return os.path.exists(store_path_for(meta_path)) or os.path.exists(meta_path)
+
+
+def load_meta(meta_path):
+    """바이너리 저장소가 있으면 MetaStore, 없으면 예전 pickle 리스트"""
+    store_path = store_path_for(meta_path)
+    if os.path.exists(store_path):
+        return MetaStore(store_path)
+    with open(meta_path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,150 @@
+import os
+import glob
+import numpy as np
+
+
+# ----------------------------- #
+# "부분 포함" 검색용 글자 n-gram 역색인
+#
+# normalize_token 된 단어(meta의 word_norm)마다 1-gram/2-gram을 뽑아
+# gram → meta id 목록(postings)을 CSR 형태로 저장한다.
+#   grams: 정렬된 gram 배열 (searchsorted로 조회)
+#   offsets: grams[i]의 postings 구간 = postings[offsets[i]:offsets[i + 1]]
+# 질의는 질의 2-gram들의 postings 교집합 → 실제 포함 여부만 확인한다.
+# 증분 업데이트는 새 id 구간만 세그먼트(ngram_index.seg<시작 id>.npz)로 추가하고,
+# 세그먼트가 MAX_SEGMENTS개를 넘으면 전체를 다시 만든다.
+# ----------------------------- #
+NGRAM_FILENAME = "ngram_index.npz"
+MAX_SEGMENTS = 8
+
+
+def ngram_path_for(faiss_path):
+    return os.path.join(os.path.dirname(faiss_path), NGRAM_FILENAME)
+
+
+def _grams(text):
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def _write_part(meta, path, start):
+    """meta[start:] 의 n-gram postings를 CSR로 저장 (임시 파일 → 교체)"""
+    postings = {}
+    for i in range(start, len(meta)):
+        m = meta[i]
+        if m is None:
+            continue
+        for g in _grams(m[1]):
+            postings.setdefault(g, []).append(i)
+
+    grams = sorted(postings)
+    offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+    np.cumsum([len(postings[g]) for g in grams], out=offsets[1:])
+    flat = np.fromiter((i for g in grams for i in postings[g]), dtype=np.int64, count=int(offsets[-1]))
+
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, grams=np.array(grams, dtype=str), offsets=offsets, postings=flat,
+             start=np.array([start], dtype=np.int64), n_meta=np.array([len(meta)], dtype=np.int64))
+    os.replace(tmp_path, path)
+
+
+def segment_paths(path):
+    """증분 세그먼트 파일 목록 (시작 id 순)"""
+    base = os.path.splitext(path)[0]
+    found = [p for p in glob.glob(f"{base}.seg*.npz") if p[len(base) + 4:-4].isdigit()]  # 임시 파일 제외
+    return sorted(found, key=lambda p: int(p[len(base) + 4:-4]))
+
+
+def build_ngram_index(meta, path):
+    """meta 전체로 n-gram 역색인 생성 후 저장 (기존 세그먼트는 삭제)"""
+    _write_part(meta, path, 0)
+    for seg in segment_paths(path):
+        os.remove(seg)
+
+
+def append_ngram_index(meta, path, start):
+    """
+    meta[start:] (새로 추가된 id)만 세그먼트로 저장 → 업데이트 비용이 추가된 단어 수에 비례.
+    저장된 색인이 start까지를 덮지 않거나 세그먼트가 MAX_SEGMENTS개를 넘으면 전체 다시 생성
+    """
+    segments = segment_paths(path)
+    last = segments[-1] if segments else path
+    if len(segments) >= MAX_SEGMENTS or not os.path.exists(last):
+        build_ngram_index(meta, path)
+        return
+    with np.load(last) as data:
+        covered = int(data["n_meta"][0])
+    if covered != start:
+        build_ngram_index(meta, path)
+        return
+    if start == len(meta):
+        return  # 추가된 항목 없음 (삭제된 항목은 조회 시 meta가 None이라 제외됨)
+    base = os.path.splitext(path)[0]
+    _write_part(meta, f"{base}.seg{start}.npz", start)
+
+
+class _Part:
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.grams = data["grams"]
+            self.offsets = data["offsets"]
+            self.postings = data["postings"]
+            self.start = int(data["start"][0]) if "start" in data else 0
+            self.n_meta = int(data["n_meta"][0])
+
+    def postings_for(self, gram):
+        pos = np.searchsorted(self.grams, gram)
+        if pos >= len(self.grams) or self.grams[pos] != gram:
+            return np.array([], dtype=np.int64)
+        return self.postings[self.offsets[pos]:self.offsets[pos + 1]]
+
+
+class NgramIndex:
+    """기본 색인 + 증분 세그먼트 (세그먼트마다 id 구간이 겹치지 않고 오름차순)"""
+
+    def __init__(self, path):
+        self.parts = [_Part(p) for p in [path] + segment_paths(path)]
+        self.n_meta = self.parts[-1].n_meta
+        # 세그먼트가 앞 색인에 이어지지 않으면(중간 파일 누락 등) 사용할 수 없음
+        self.contiguous = all(a.n_meta == b.start for a, b in zip(self.parts, self.parts[1:]))
+
+    def _postings(self, gram):
+        lists = [p.postings_for(gram) for p in self.parts]
+        return lists[0] if len(lists) == 1 else np.concatenate(lists)
+
+    def candidates(self, query_norm):
+        """query_norm을 포함할 수 있는 meta id 후보 (정렬된 배열)"""
+        if not query_norm:
+            return np.array([], dtype=np.int64)
+        if len(query_norm) == 1:
+            return self._postings(query_norm)
+        lists = sorted((self._postings(g) for g in _grams(query_norm) if len(g) == 2), key=len)
+        result = lists[0]
+        for p in lists[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, p, assume_unique=True)
+        return result
+
+    def partial_matches(self, query_norm, meta):
+        """query_norm을 포함하되 같지는 않은 meta id 목록"""
+        matched = []
+        for idx in self.candidates(query_norm):
+            if idx >= len(meta):
+                continue
+            m = meta[idx]
+            if m is not None and query_norm in m[1] and query_norm != m[1]:
+                matched.append(int(idx))
+        return matched
+
+
+def load_ngram_index(path, meta):
+    """저장된 역색인이 현재 meta와 맞으면 반환, 없거나 오래됐으면 None"""
+    if not os.path.exists(path):
+        return None
+    index = NgramIndex(path)
+    if not index.contiguous or index.n_meta != len(meta):
+        print("⚠️ n-gram 색인이 메타데이터와 맞지 않아 사용하지 않습니다.")
+        return None
+    return index
@@ -0,0 +1,97 @@
+import os
+import sys
+import queue
+import threading
+import subprocess
+from multiprocessing.connection import Connection
+
+
+# ----------------------------- #
+# LLM이 생성한 그래프 코드 실행용 샌드박스
+#   - 미리 띄워 둔 작업자 프로세스 (llm_agent/plot_sandbox_worker.py, pandas / seaborn / matplotlib(Agg, NanumGothic) 로딩 완료 상태)
+#   - 작업자는 python -m 으로 새로 실행 → 서버 프로세스의 스레드/잠금도, server.py import 부작용도 없음
+#   - 작업마다 CPU 시간 제한 (RLIMIT_CPU), 메모리 제한 (RLIMIT_AS), 벽시계 제한 (초과 시 프로세스 교체)
+# 결과 PNG 캐시는 llm_agent/chart_store.py (키: 코드 해시 + DataFrame 지문)
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SANDBOX_WORKERS = min(2, os.cpu_count() or 1)
+CPU_LIMIT_SEC = 60                 # 작업 하나의 CPU 시간
+TIME_LIMIT_SEC = 90                # 작업 하나의 벽시계 시간
+MEMORY_LIMIT_BYTES = 4 * 1024 ** 3
+
+
+class _SandboxWorker:
+    def __init__(self):
+        self._start()
+
+    def _start(self):
+        request_r, request_w = os.pipe()
+        response_r, response_w = os.pipe()
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (BASE_DIR, env.get("PYTHONPATH")) if p)
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "llm_agent.plot_sandbox_worker", str(CPU_LIMIT_SEC), str(MEMORY_LIMIT_BYTES)],
+                stdin=request_r, stdout=response_w, env=env,
+            )
+        except Exception:
+            for fd in (request_r, request_w, response_r, response_w):
+                os.close(fd)
+            raise
+        os.close(request_r)
+        os.close(response_w)
+        self.requests = Connection(request_w, readable=False)
+        self.responses = Connection(response_r, writable=False)
+
+    def restart(self):
+        self.process.kill()
+        self.process.wait()
+        self.requests.close()
+        self.responses.close()
+        self._start()
+
+    def run(self, code, df, timeout):
+        try:
+            self.requests.send((code, df))
+        except (BrokenPipeError, OSError):  # 작업 사이에 작업자가 죽은 경우
+            self.restart()
+            self.requests.send((code, df))
+        if not self.responses.poll(timeout):
+            self.restart()
+            raise TimeoutError(f"그래프 코드 실행 시간 초과 ({timeout}초)")
+        try:
+            ok, error = self.responses.recv()
+        except EOFError:
+            self.restart()
+            raise RuntimeError("그래프 코드 실행 중 작업자 종료 (CPU/메모리 제한 초과)")
+        if not ok:
+            raise RuntimeError(error)
+
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def _get_workers():
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            _workers = queue.Queue()
+            for _ in range(SANDBOX_WORKERS):
+                _workers.put(_SandboxWorker())
+        return _workers
+
+
+def start_sandbox():
+    """작업자 프로세스를 미리 띄움 (서버 시작 시 호출하면 첫 요청 지연이 없음)"""
+    _get_workers()
+
+
+def run_plot_code(code, df, timeout=TIME_LIMIT_SEC):
+    """샌드박스 작업자에서 코드 실행. 실패/시간 초과 시 예외"""
+    workers = _get_workers()
+    worker = workers.get()
+    try:
+        worker.run(code, df, timeout)
+    finally:
+        workers.put(worker)
@@ -0,0 +1,69 @@
+import os
+import sys
+import resource
+from multiprocessing.connection import Connection
+
+
+# ----------------------------- #
+# 그래프 코드 샌드박스 작업자 (llm_agent/plot_sandbox.py 가 별도 프로세스로 실행)
+# 실행: python -m llm_agent.plot_sandbox_worker <CPU 시간 제한(초)> <메모리 제한(바이트)>
+#   stdin: (코드, DataFrame) 요청 / stdout: (성공 여부, 오류) 응답 (multiprocessing Connection 형식)
+#   생성 코드의 print 가 응답 채널에 섞이지 않도록 fd 1 은 stderr 로 돌린다.
+# server.py 를 import 하지 않으므로 서버의 import 부작용(DB 적재 등)이 작업자에서 실행되지 않는다.
+# ----------------------------- #
+def _open_channel():
+    request_fd = os.dup(0)
+    response_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+    return Connection(request_fd, writable=False), Connection(response_fd, readable=False)
+
+
+def main(cpu_limit_sec, memory_limit_bytes):
+    requests, responses = _open_channel()
+
+    import numpy as np
+    import pandas as pd
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+    try:
+        import seaborn as sns
+    except ImportError:
+        sns = None
+    plt.rcParams["font.family"] = "NanumGothic"
+    plt.rcParams["axes.unicode_minus"] = False
+
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    except (ValueError, OSError):
+        pass
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+
+    while True:
+        try:
+            code, df = requests.recv()
+        except EOFError:
+            return
+
+        # RLIMIT_CPU는 프로세스 누적값이므로 지금까지 사용량 + 작업 한도로 설정 (초과 시 SIGXCPU로 종료)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + cpu_limit_sec
+        if cpu_hard != resource.RLIM_INFINITY:
+            soft = min(soft, cpu_hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu_hard))
+
+        try:
+            exec(code, {"__name__": "__chart__", "df_table": [df], "i": 0,
+                        "pd": pd, "np": np, "plt": plt, "sns": sns})
+            responses.send((True, None))
+        except BaseException as e:  # 생성 코드의 sys.exit() 등도 작업 실패로 처리
+            responses.send((False, f"{type(e).__name__}: {e}"))
+        finally:
+            plt.close("all")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]), int(sys.argv[2]))
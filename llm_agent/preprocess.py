@@ -1,55 +1,132 @@
 import pandas as pd
+import numpy as np
 import glob
 import os
 import warnings
+import itertools
+from openpyxl import load_workbook
+from pandas._libs.parsers import STR_NA_VALUES
+from llm_agent.table_store import write_table, TableChunkWriter, infer_table_dtypes
+from llm_agent.csv_2_db import load_table_chunks, open_load_connection, finish_load, upsert_tables
 
 warnings.filterwarnings("ignore")
 
 
+HEADER_WINDOW = 32  # 헤더 판정 시 한 번에 보는 행 수 (헤더가 더 길면 다음 구간으로 이어서 확인)
+
+
+def _ffill_rows(values, missing):
+    """행 방향(왼쪽 → 오른쪽) ffill. 반환: (채운 값, 결측 여부)"""
+    cols = np.arange(values.shape[1])
+    idx = np.maximum.accumulate(np.where(missing, 0, cols), axis=1)
+    filled = np.take_along_axis(values, idx, axis=1)
+    filled_missing = np.take_along_axis(missing, idx, axis=1)
+    return filled, filled_missing
+
+
+def _ffill_cols(values, missing):
+    """열 방향(위 → 아래) ffill. 반환: (채운 값, 결측 여부)"""
+    rows = np.arange(values.shape[0])[:, None]
+    idx = np.maximum.accumulate(np.where(missing, 0, rows), axis=0)
+    filled = np.take_along_axis(values, idx, axis=0)
+    filled_missing = np.take_along_axis(missing, idx, axis=0)
+    return filled, filled_missing
+
+
+def _adjacent_equal(values, missing):
+    """[행, i]: i번째와 i+1번째 값이 둘 다 있고 같은지"""
+    both = ~missing[:, :-1] & ~missing[:, 1:]
+    safe = np.where(missing, None, values)  # 결측끼리 비교하지 않도록 (pd.NA == x 는 bool이 아님)
+    return both & (safe[:, :-1] == safe[:, 1:]).astype(bool)
+
+
+def _not_placeholder(values, missing):
+    safe = np.where(missing, None, values)[:, :-1]
+    return ~((safe == "").astype(bool) | (safe == "-").astype(bool))
+
+
 def infer_header_rows(df):
-    df_copy = df.copy()
-    max_depth = len(df_copy)
-    depth = 1  # 규칙 1: 최소 1개는 헤더로 간주
-
-    # 규칙 2: 첫 번째 행 확인
-    row0 = df_copy.iloc[0].ffill().to_list()
-    df_copy.iloc[0] = row0
-    for i in range(len(row0) - 1):
-        val1, val2 = row0[i], row0[i + 1]
-        if pd.notna(val1) and pd.notna(val2) and val1 == val2 and val1 not in ["", "-"]:
-            depth = 2
-            break  # 최소 2개로 설정하고 나머지 행 검사로 넘어감
-
-    # 규칙 3: 두 번째 행부터는 위와 다르면 추가
-    for row_idx in range(1, max_depth):
-        df_copy.iloc[:row_idx] = df_copy.iloc[:row_idx].ffill()
-        row = df_copy.iloc[row_idx].ffill().to_list()
-        prev_row = df_copy.iloc[row_idx - 1].ffill().to_list()
-        df_copy.iloc[row_idx] = row
-
-        repeated_with_change = False
-        for i in range(len(row) - 1):
-            val1, val2 = row[i], row[i + 1]
-            prev_val1, prev_val2 = prev_row[i], prev_row[i + 1]
-
-            if (
-                pd.notna(val1) and pd.notna(val2) and val1 == val2 and val1 not in ["", "-"] and
-                pd.notna(prev_val1) and pd.notna(prev_val2) and prev_val1 == prev_val2
-            ):
-                repeated_with_change = True
-                break
-
-        if repeated_with_change:
-            depth += 1
+    """
+    헤더 줄 수 추론.
+    규칙 1: 최소 1줄
+    규칙 2: 첫 행(왼쪽으로 채운 값)에 같은 값이 연달아 있으면 최소 2줄 (병합 셀)
+    규칙 3: 둘째 행부터, 그 행과 위 행(위로 채운 값) 모두에 같은 값이 연달아 나오는 자리가 있으면 한 줄씩 추가
+
+    전체 행을 반복하지 않고 HEADER_WINDOW 행씩 잘라 NumPy로 한 번에 비교한다.
+    규칙 3이 구간 끝까지 이어질 때만 다음 구간을 본다.
+    """
+    values = df.to_numpy(dtype=object)
+    n_rows = len(values)
+    depth = None
+    carry = carry_missing = None  # 이전 구간의 마지막 (위로 채운) 행
+
+    for start in range(0, n_rows, HEADER_WINDOW):
+        block = values[start:start + HEADER_WINDOW]
+        row_filled, row_missing = _ffill_rows(block, pd.isna(block))
+        row_eq = _adjacent_equal(row_filled, row_missing) & _not_placeholder(row_filled, row_missing)
+
+        if depth is None:
+            depth = 2 if row_eq[0].any() else 1  # 규칙 2
+
+        # 위 행: 지금까지의 행을 위로 채운 뒤 다시 왼쪽으로 채운 값
+        if carry is not None:
+            row_filled = np.vstack([carry, row_filled])
+            row_missing = np.vstack([carry_missing, row_missing])
+        col_filled, col_missing = _ffill_cols(row_filled, row_missing)
+        prev_filled, prev_missing = _ffill_rows(col_filled, col_missing)
+        prev_eq = _adjacent_equal(prev_filled, prev_missing)
+        if carry is None:
+            prev_eq, row_eq = prev_eq[:-1], row_eq[1:]  # 첫 구간: 행 1부터, 위 행은 0부터
         else:
-            break  # 조건에 맞지 않으면 헤더 확장 중지
+            prev_eq = prev_eq[:-1]
+
+        matched = (row_eq & prev_eq).any(axis=1)
+        misses = np.flatnonzero(~matched)
+        if len(misses):
+            return depth + int(misses[0])  # 규칙 3: 처음 어긋난 행에서 중단
+        depth += len(matched)
+
+        carry, carry_missing = col_filled[-1:], col_missing[-1:]
 
     return depth
 
 
-def preprocess_excel_with_variable_header(file_path):
-    # Step 1: 파일 전체 불러오기
-    df_raw = pd.read_excel(file_path, header=None)
+def build_headers(header_df):
+    """헤더 행들 → 컬럼명 (여러 줄이면 "_"로 결합하고 반복되는 부분 제거)"""
+    header_df = header_df.ffill(axis=1)
+    if len(header_df) == 1:
+        # 단일 헤더
+        return header_df.iloc[0]
+
+    # 다중 헤더 → 문자열 결합
+    combined = header_df.astype(str).apply(lambda x: "_".join(x), axis=0)
+
+    def remove_redundant_prefix(header):
+        parts = header.split("_")
+        seen = set()
+        unique_parts = []
+        for part in parts:
+            if part not in seen:
+                seen.add(part)
+                unique_parts.append(part)
+        return "_".join(unique_parts)
+
+    return combined.apply(remove_redundant_prefix)
+
+
+def clean_data_rows(df_data, headers):
+    df_data.columns = headers
+    df_data.reset_index(drop=True, inplace=True)
+    df_data.replace("-", pd.NA, inplace=True)
+    df_data.replace("X", pd.NA, inplace=True)
+    return df_data
+
+
+def preprocess_excel_with_variable_header(file_path, sheet_name=None):
+    # Step 1: 파일 전체 불러오기 (sheet_name이 없으면 첫 시트)
+    df_raw = pd.read_excel(file_path, header=None, sheet_name=0 if sheet_name is None else sheet_name)
+    if df_raw.empty:
+        raise EmptySheetError(f"빈 시트입니다: {file_path} {sheet_name or ''}".rstrip())
 
     # Step 1.5: 모든 값이 NA인 열 제거
     df_raw = df_raw.dropna(axis=1, how="all")
@@ -60,43 +137,186 @@ def preprocess_excel_with_variable_header(file_path):
     # Step 3: 헤더 줄 수 추론
     inferred_header_rows = infer_header_rows(df_raw)
 
-    df_raw.iloc[:inferred_header_rows] = df_raw.iloc[:inferred_header_rows].ffill(axis=1)
-
     # Step 4: 헤더 생성
-    data_start_row = inferred_header_rows
-    if inferred_header_rows == 1:
-        # 단일 헤더
-        headers = df_raw.iloc[0]
-    else:
-        # 다중 헤더 → 문자열 결합
-        header_df = df_raw.iloc[0:inferred_header_rows]
-        combined = header_df.astype(str).apply(lambda x: "_".join(x), axis=0)
-
-        def remove_redundant_prefix(header):
-            parts = header.split("_")
-            seen = set()
-            unique_parts = []
-            for part in parts:
-                if part not in seen:
-                    seen.add(part)
-                    unique_parts.append(part)
-            return "_".join(unique_parts)
-
-        headers = combined.apply(remove_redundant_prefix)
+    headers = build_headers(df_raw.iloc[:inferred_header_rows])
 
     # Step 5: 데이터 정리
-    df_data = df_raw.iloc[data_start_row:, :].copy()
-    df_data.columns = headers
-    df_data.reset_index(drop=True, inplace=True)
-    df_data.replace("-", pd.NA, inplace=True)
-    df_data.replace("X", pd.NA, inplace=True)
+    df_data = df_raw.iloc[inferred_header_rows:, :].copy()
+    return clean_data_rows(df_data, headers)
 
-    return df_data
+
+# ----------------------------- #
+# 대용량 엑셀: 스트리밍 전처리
+#   openpyxl read_only 모드로 행을 순서대로 읽고,
+#   앞 HEADER_SAMPLE_ROWS 행으로 헤더를 정한 뒤 STREAM_CHUNK_ROWS 행씩 CSV/parquet(+SQLite)에 바로 쓴다.
+#   전체 시트를 DataFrame으로 만들지 않으므로 메모리는 청크 크기에 비례.
+# ----------------------------- #
+HEADER_SAMPLE_ROWS = 200
+STREAM_CHUNK_ROWS = 20000
+STREAM_MIN_BYTES = 20 * 1024 ** 2  # preprocess_run 에서 이보다 큰 파일은 스트리밍 경로 사용
+# pd.read_excel 기본 na_values ("", "NA", "N/A", "NULL", "nan", "None", "#N/A" 등)
+NA_STRINGS = frozenset(STR_NA_VALUES)
+
+
+class EmptySheetError(ValueError):
+    pass
+
+
+def _cell_value(cell):
+    """
+    pd.read_excel(openpyxl) 과 같은 값으로 변환 → 빈 칸/NA는 None
+    - 오류 셀(#DIV/0! 등, data_type "e") → None
+    - 문자열 셀은 기본 na_values에 있으면 None, 아니면 그대로 ("#DIV/0!" 라고 입력한 문자열은 유지)
+    - 정수인 실수 → int
+    """
+    value = cell.value
+    if value is None or cell.data_type == "e":
+        return None
+    if isinstance(value, str):
+        return None if value in NA_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_sheet_rows(file_path, sheet_name=None):
+    """
+    시트의 행을 튜플로 하나씩 반환 (read_only 모드).
+    pd.read_excel 처럼 끝부분의 빈 행은 버린다 (중간의 빈 행은 유지).
+    read_only 모드는 파일의 <dimension> 기록까지만 읽으므로, 기록이 틀린 파일(다른 프로그램이 만든 엑셀 등)에서
+    데이터가 잘리지 않도록 pd.read_excel 처럼 reset_dimensions() 후 실제 행/열을 끝까지 읽는다.
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0] if sheet_name is None else wb[sheet_name]
+        ws.reset_dimensions()
+        pending_empty = 0
+        for row in ws.iter_rows():  # 오류 셀 구분에 data_type이 필요하므로 셀 객체로 읽음
+            values = tuple(_cell_value(c) for c in row)
+            if all(v is None for v in values):
+                pending_empty += 1  # 뒤에 데이터가 있을 때만 내보냄
+                continue
+            for _ in range(pending_empty):
+                yield ()
+            pending_empty = 0
+            yield values
+    finally:
+        wb.close()
+
+
+def _rows_to_frame(rows, width):
+    """길이가 다른 행을 width에 맞춰 자르거나 빈 칸으로 채운 DataFrame (빈 칸은 read_excel 처럼 NaN)"""
+    fixed = [tuple(r[:width]) + (None,) * (width - len(r)) for r in rows]
+    df = pd.DataFrame(fixed, columns=range(width), dtype=object)
+    return df.where(df.notna(), np.nan)
+
+
+def iter_excel_chunks(file_path, sheet_name=None, chunk_rows=STREAM_CHUNK_ROWS,
+                      header_sample_rows=HEADER_SAMPLE_ROWS):
+    """
+    preprocess_excel_with_variable_header 와 같은 전처리를 청크 단위로 수행.
+    (컬럼명이 붙은 데이터 청크를 차례로 반환, 데이터 행이 없으면 빈 DataFrame 하나)
+
+    전체 시트를 보지 않으므로 원래 경로와 다른 점:
+    - 빈 열 판단과 열 개수는 앞 header_sample_rows 행 기준 (그 뒤에만 값이 있는 열은 제외)
+    - 헤더 줄 수는 최대 header_sample_rows - 1
+    """
+    rows = iter_sheet_rows(file_path, sheet_name)
+    sample_rows = list(itertools.islice(rows, header_sample_rows))
+    if not sample_rows:
+        raise EmptySheetError(f"빈 시트입니다: {file_path} {sheet_name or ''}".rstrip())
+
+    # Step 1~2: 빈 열 제거 + 병합 셀 보정 (헤더 샘플 기준)
+    width = max(len(r) for r in sample_rows)
+    sample = _rows_to_frame(sample_rows, width)
+    keep = [c for c in sample.columns if sample[c].notna().any()]
+    sample = sample[keep].ffill()
+
+    # Step 3~4: 헤더
+    depth = infer_header_rows(sample)
+    if len(sample_rows) == header_sample_rows:
+        depth = min(depth, header_sample_rows - 1)  # 뒤에 행이 더 있으므로 최소 한 행은 데이터로
+    headers = build_headers(sample.iloc[:depth])
+
+    # Step 5: 데이터 청크 (위 청크의 마지막 값으로 이어서 ffill)
+    carry = sample.iloc[[min(depth, len(sample)) - 1]]
+    data_rows = itertools.chain(sample_rows[depth:], rows)
+    emitted = False
+    while True:
+        batch = list(itertools.islice(data_rows, chunk_rows))
+        if not batch:
+            break
+        chunk = _rows_to_frame(batch, width)[keep]
+        chunk = pd.concat([carry, chunk]).ffill().iloc[1:]
+        carry = chunk.iloc[[-1]]
+        yield clean_data_rows(chunk.copy(), headers)
+        emitted = True
+
+    if not emitted:
+        yield clean_data_rows(sample.iloc[depth:].copy(), headers)
+
+
+def stream_excel_to_table(file_path, save_path='./data/csv_data', db_path=None, sheet_name=None,
+                          table_name=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    엑셀 → CSV(+parquet) 스트리밍 저장. db_path를 주면 같은 청크로 SQLite 테이블도 적재.
+    table_name: CSV 파일명(확장자 제외), 없으면 엑셀 파일명
+    반환: CSV 경로
+    """
+    if table_name is None:
+        table_name = os.path.basename(file_path)[:-5]
+    csv_path = os.path.join(save_path, table_name + '.csv')
+    chunks = iter_excel_chunks(file_path, sheet_name, chunk_rows)
+
+    with TableChunkWriter(csv_path) as writer:
+        def written_chunks():
+            for chunk in chunks:
+                writer.write(chunk)
+                print(f"[INFO] {table_name}: {writer.rows}행 저장")
+                yield chunk
+
+        if db_path is None:
+            for _ in written_chunks():
+                pass
+        else:
+            conn = open_load_connection(db_path)
+            try:
+                # CSV를 다시 읽었을 때와 같은 타입으로 적재
+                load_table_chunks(conn, table_name, (infer_table_dtypes(c) for c in written_chunks()))
+                finish_load(conn, [table_name])
+            finally:
+                conn.close()
+    return csv_path
+
+
+def excel_to_table(file_path, save_path='./data/csv_data', db_path=None, sheet_name=None,
+                   table_name=None, streaming=None):
+    """
+    엑셀 시트 → CSV(+parquet). db_path를 주면 SQLite 테이블도 적재.
+    streaming: None이면 파일 크기로 결정 (STREAM_MIN_BYTES 이상이면 스트리밍)
+    preprocess_run 과 bulk_ingest 가 같은 기준으로 경로를 골라 같은 결과를 만들도록 여기서만 결정한다.
+    반환: CSV 경로
+    """
+    if streaming is None:
+        streaming = os.path.getsize(file_path) >= STREAM_MIN_BYTES
+    if streaming:
+        return stream_excel_to_table(file_path, save_path, db_path=db_path, sheet_name=sheet_name,
+                                     table_name=table_name)
+
+    if table_name is None:
+        table_name = os.path.basename(file_path)[:-5]
+    csv_path = os.path.join(save_path, table_name + '.csv')
+    df = preprocess_excel_with_variable_header(file_path, sheet_name)
+    write_table(df, csv_path)  # CSV + parquet
+    if db_path is not None:
+        upsert_tables([csv_path], db_path)
+    return csv_path
 
 
 def data_save(df, load_path, save_path='./data/csv_data'):
     data_save_path = save_path + '/' + load_path.split('/')[-1][:-5] + '.csv'
-    df.to_csv(data_save_path, index = False)
+    write_table(df, data_save_path)  # CSV + parquet
+    return data_save_path
 
 
 
@@ -125,14 +345,18 @@ def data_save(df, load_path, save_path='./data/csv_data'):
 
 #     print(f"[INFO] 총 {count}개 파일 저장 완료")
 
-def preprocess_run(file_path):
+def preprocess_run(file_path, streaming=None, db_path=None):
+    """
+    streaming: None이면 파일 크기로 결정 (STREAM_MIN_BYTES 이상이면 스트리밍)
+    db_path: 스트리밍 경로에서 SQLite 테이블도 같은 청크로 적재
+    """
     save_path = os.path.abspath('./data/csv_data')
     os.makedirs(save_path, exist_ok=True)
 
     try:
-        df = preprocess_excel_with_variable_header(file_path)
-        data_save(df, file_path, save_path)
+        csv_path = excel_to_table(file_path, save_path, db_path=db_path, streaming=streaming)
         print(f"[INFO] 파일 처리 및 저장 완료")
+        return csv_path
     except Exception as e:
         print(f"[ERROR] 파일 처리 실패: {file_path}, 이유: {e}")
         raise
\ No newline at end of file
@@ -0,0 +1,156 @@
+import os
+import hashlib
+import argparse
+import numpy as np
+import torch
+
+
+# ----------------------------- #
+# KURE 임베딩 모델 int8 동적 양자화 (CPU 전용 노드용)
+#   - 첫 변환 후 int8 state_dict + 원본 모델 지문을 저장 → 같은 모델이면 품질 검사 없이 로드
+#     (모델 객체 pickle이 아니라 weights_only=True로 읽을 수 있는 텐서만 저장)
+#   - 변환 시 fp32 모델과 임베딩 코사인 유사도를 비교해 품질 확인
+# 사용: KURE_QUANTIZED=1 로 실행하면 search / embedding 이 양자화 모델 사용
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+USE_QUANTIZED = os.getenv("KURE_QUANTIZED", "0") == "1"
+QUANTIZED_HF_PATH = os.path.join(BASE_DIR, "llm_agent", "KURE-v1-int8.pt")      # embedding.py (AutoModel)
+QUANTIZED_SBERT_PATH = os.path.join(BASE_DIR, "llm_agent", "KURE-v1-st-int8.pt")  # search.py (SentenceTransformer)
+
+MIN_MEAN_COSINE = 0.99  # fp32 대비 평균 코사인 유사도 하한
+MIN_COSINE = 0.97       # 개별 문장 최소값 하한
+QUALITY_CHECK_TEXTS = [
+    "전라북도", "전북 대학교 면적", "전라북도_대학교_인원현황", "합계", "전주시", "군산시 인구",
+    "2023년", "구분", "남자", "여자", "교원 수", "재학생 수", "학교 용지 면적(㎡)", "익산시",
+    "65세 이상 고령인구 비율", "시군별 사업체 수",
+]
+
+
+def quantize_dynamic_int8(model):
+    """Linear 레이어를 int8 동적 양자화한 복사본 반환 (가중치 int8, 활성값은 실행 시 양자화)"""
+    model = model.to("cpu").eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=False)
+
+
+def check_quality(encode_fp32, encode_int8, texts=QUALITY_CHECK_TEXTS):
+    """두 인코더의 정규화 임베딩 코사인 유사도 (평균, 최소) 반환"""
+    a = np.asarray(encode_fp32(texts), dtype=np.float32)
+    b = np.asarray(encode_int8(texts), dtype=np.float32)
+    a /= np.linalg.norm(a, axis=1, keepdims=True)
+    b /= np.linalg.norm(b, axis=1, keepdims=True)
+    cos = (a * b).sum(axis=1)
+    return float(cos.mean()), float(cos.min())
+
+
+def _passes(mean_cos, min_cos):
+    print(f"[INFO] 양자화 품질: 평균 코사인 {mean_cos:.4f}, 최소 {min_cos:.4f}")
+    if mean_cos < MIN_MEAN_COSINE or min_cos < MIN_COSINE:
+        print("⚠️ 양자화 모델 품질 기준 미달 → fp32 모델 사용")
+        return False
+    return True
+
+
+def model_fingerprint(model_path, config=None):
+    """
+    양자화 캐시가 어떤 fp32 모델에서 만들어졌는지 구분하는 값.
+    로컬 폴더면 파일 이름/크기/수정 시각, 허브 모델이면 커밋 해시 + torch 버전(packed 가중치 형식)
+    """
+    h = hashlib.sha1(f"{model_path}|torch {torch.__version__}".encode("utf-8"))
+    if os.path.isdir(model_path):
+        for root, _, files in sorted(os.walk(model_path)):
+            for name in sorted(files):
+                st = os.stat(os.path.join(root, name))
+                h.update(f"{os.path.relpath(os.path.join(root, name), model_path)}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    else:
+        h.update(str(getattr(config, "_commit_hash", None) or "unknown").encode("utf-8"))
+    return h.hexdigest()
+
+
+def _load_cached(quantized, path, fingerprint):
+    """저장된 int8 state_dict를 quantized 모델에 적재. 없거나 다른 모델에서 만든 것이면 False"""
+    if not os.path.exists(path):
+        return False
+    try:
+        saved = torch.load(path, map_location="cpu", weights_only=True)
+        if saved.get("fingerprint") != fingerprint:
+            print(f"⚠️ 양자화 모델이 현재 모델과 다름 → 다시 변환: {path}")
+            return False
+        quantized.load_state_dict(saved["state_dict"])
+    except Exception as e:
+        print(f"⚠️ 양자화 모델 로드 실패 → 다시 변환: {path}, 이유: {e}")
+        return False
+    print(f"[INFO] 양자화 모델 로드: {path}")
+    return True
+
+
+def _save(quantized, path, fingerprint):
+    tmp_path = path + ".tmp"
+    torch.save({"fingerprint": fingerprint, "state_dict": quantized.state_dict()}, tmp_path)
+    os.replace(tmp_path, path)
+    print(f"[INFO] 양자화 모델 저장: {path}")
+
+
+# ----------------------------- #
+# embedding.py 용 (AutoTokenizer + AutoModel, CLS 벡터)
+# ----------------------------- #
+def load_quantized_encoder(model_path, path=QUANTIZED_HF_PATH):
+    """
+    반환: (tokenizer, int8 모델 또는 품질 미달 시 fp32 모델, cpu)
+    저장된 양자화 가중치가 같은 모델에서 만든 것이면 품질 검사 없이 그대로 사용.
+    """
+    from transformers import AutoTokenizer, AutoModel
+    from llm_agent.embedding import encode_texts
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    cpu = torch.device("cpu")
+    model = AutoModel.from_pretrained(model_path).to(cpu).eval()
+    quantized = quantize_dynamic_int8(model)  # 복사본을 양자화 (model은 fp32 그대로)
+    fingerprint = model_fingerprint(model_path, model.config)
+    if _load_cached(quantized, path, fingerprint):
+        return tokenizer, quantized.eval(), cpu
+
+    mean_cos, min_cos = check_quality(
+        lambda t: encode_texts(t, tokenizer, model, cpu, use_cache=False),
+        lambda t: encode_texts(t, tokenizer, quantized, cpu, use_cache=False),
+    )
+    if not _passes(mean_cos, min_cos):
+        return tokenizer, model, cpu
+    _save(quantized, path, fingerprint)
+    return tokenizer, quantized, cpu
+
+
+# ----------------------------- #
+# search.py 용 (SentenceTransformer)
+# ----------------------------- #
+def load_quantized_sentence_model(sbert_path, path=QUANTIZED_SBERT_PATH):
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(sbert_path, device="cpu")
+    quantized = quantize_dynamic_int8(model)  # 복사본을 양자화 (model은 fp32 그대로)
+    fingerprint = model_fingerprint(sbert_path, model._first_module().auto_model.config)
+    if _load_cached(quantized, path, fingerprint):
+        return quantized.eval()
+
+    encode = lambda m: (lambda t: m.encode(t, convert_to_numpy=True, normalize_embeddings=True))
+    if not _passes(*check_quality(encode(model), encode(quantized))):
+        return model
+    _save(quantized, path, fingerprint)
+    return quantized
+
+
+if __name__ == "__main__":
+    # 실행: python -m llm_agent.quantize [--force]  → 두 양자화 모델을 미리 만들어 둔다
+    parser = argparse.ArgumentParser(description="KURE 모델 int8 동적 양자화")
+    parser.add_argument("--force", action="store_true", help="저장된 양자화 모델을 지우고 다시 변환")
+    args = parser.parse_args()
+
+    from llm_agent.embedding import encoder_model_path
+    from llm_agent.search import SBERT_PATH
+
+    if args.force:
+        for p in (QUANTIZED_HF_PATH, QUANTIZED_SBERT_PATH):
+            if os.path.exists(p):
+                os.remove(p)
+    load_quantized_encoder(encoder_model_path())
+    load_quantized_sentence_model(SBERT_PATH)
@@ -1,15 +1,23 @@
 import os
-import pickle
 import faiss
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import re
+import threading
+from collections import OrderedDict
+from llm_agent.meta_store import load_meta, meta_files
+from llm_agent.ngram_index import load_ngram_index, ngram_path_for
+from llm_agent.quantize import USE_QUANTIZED, load_quantized_sentence_model
+from llm_agent.embedding_cache import USE_EMBEDDING_CACHE, get_embedding_cache
 
 
 # 경로 설정
 FAISS_INDEX_PATH = os.path.abspath("./data/faiss/faiss_index.idx")
 META_PATH = os.path.abspath("./data/faiss/faiss_meta.pkl")
 SBERT_PATH = os.path.abspath("./llm_agent/KURE-v1")
+INITIAL_TOP_K = 64  # 적응형 top-k 시작 값 (thres1 아래 점수가 나올 때까지 증가)
+NGRAM_PATH = ngram_path_for(FAISS_INDEX_PATH)
+QUERY_CACHE_SIZE = 1024  # 질의 임베딩 LRU 캐시 크기
 
 
 # 정규화 함수
@@ -20,12 +28,117 @@ def normalize_token(text):
     return text.strip()
 
 
-# 검색 함수
-def search_faiss_with_partial_and_similarity(query_word, model, index, meta, file_token_index, thres1=0.4, thres2=0.5):
-    query_norm = normalize_token(query_word)
-    query_vec = model.encode(query_norm, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
-    print("🔍 query_vec.shape:", np.array([query_vec]).shape)
-    print("🔍 index.d (expected):", index.d)
+# 질의 임베딩 LRU 캐시 (정규화된 질의 → 벡터). 모델은 KURE 하나만 쓰므로 질의 문자열만 키로 사용
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def clear_query_cache():
+    with _query_cache_lock:
+        _query_cache.clear()
+
+
+def _corpus_cache(model):
+    """
+    말뭉치 임베딩 디스크 캐시 (embedding.py 가 색인할 때 저장한 CLS 벡터).
+    SentenceTransformer 풀링이 CLS일 때만 같은 벡터이므로 그때만 반환
+    """
+    if not USE_EMBEDDING_CACHE or len(model) < 2:
+        return None
+    pooling = getattr(model[1], "get_pooling_mode_str", lambda: "")()
+    if pooling != "cls":
+        return None
+    return get_embedding_cache(model._first_module().auto_model, "hf-cls")
+
+
+def encode_queries(model, query_norms, batch_size=64):
+    """
+    정규화된 질의 목록 → (N, d) float32 벡터.
+    메모리 LRU → 디스크 임베딩 캐시 순으로 찾고, 남은 질의만 모아 한 번의 model.encode 호출로 배치 인코딩한다.
+    디스크 캐시는 읽기만 한다 (크기 제한이 없으므로 질의는 메모리 LRU에만 보관, 디스크에는 말뭉치 임베딩만 저장).
+    """
+    vecs = [None] * len(query_norms)
+    missing = {}
+    with _query_cache_lock:
+        for i, q in enumerate(query_norms):
+            if q in _query_cache:
+                _query_cache.move_to_end(q)
+                vecs[i] = _query_cache[q]
+            else:
+                missing.setdefault(q, []).append(i)
+
+    if missing:
+        texts = list(missing.keys())
+        found = {}
+        cache = _corpus_cache(model)
+        if cache:
+            found = cache.get(texts)  # 색인할 때 계산한 같은 문자열
+        to_encode = [q for q in texts if q not in found]
+        if to_encode:
+            computed = model.encode(to_encode, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+            found.update(zip(to_encode, computed))
+        encoded = [found[q] for q in texts]
+        with _query_cache_lock:
+            for q, vec in zip(texts, encoded):
+                _query_cache[q] = vec
+                _query_cache.move_to_end(q)
+                for i in missing[q]:
+                    vecs[i] = vec
+            while len(_query_cache) > QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+
+    return np.vstack(vecs) if vecs else np.zeros((0, 0), dtype=np.float32)
+
+
+# thres 이상인 결과만 점수 내림차순으로 반환 (질의 여러 개)
+def search_above_threshold_batch(index, query_vecs, thres, mode="topk", k=INITIAL_TOP_K):
+    """
+    index.ntotal 전체를 정렬하지 않고 thres 이상인 결과만 가져온다.
+
+    - mode="topk": k개씩 검색하고, 마지막 점수가 thres 이상인 질의만 k를 늘려 다시 검색
+    - mode="range": range_search(thres) (지원하지 않는 인덱스면 topk로 대체)
+    - 반환: 질의별 (D, I) 목록
+    """
+    n = len(query_vecs)
+    if index.ntotal == 0:
+        return [(np.array([], dtype=np.float32), np.array([], dtype=np.int64))] * n
+
+    if mode == "range":
+        try:
+            lims, D, I = index.range_search(query_vecs, thres)
+            results = []
+            for q in range(n):
+                d, i = D[lims[q]:lims[q + 1]], I[lims[q]:lims[q + 1]]
+                order = np.argsort(-d, kind="stable")
+                results.append((d[order], i[order]))
+            return results
+        except RuntimeError:
+            pass
+
+    results = [None] * n
+    pending = np.arange(n)
+    k = min(k, index.ntotal)
+    while len(pending):
+        D, I = index.search(query_vecs[pending], k)
+        unfinished = []
+        for row, q in enumerate(pending):
+            if k < index.ntotal and D[row][-1] >= thres:
+                unfinished.append(q)
+                continue
+            mask = (I[row] >= 0) & (D[row] >= thres)
+            results[q] = (D[row][mask], I[row][mask])
+        pending = np.array(unfinished, dtype=np.int64)
+        k = min(k * 4, index.ntotal)
+    return results
+
+
+def search_above_threshold(index, query_vecs, thres, mode="topk", k=INITIAL_TOP_K):
+    """질의 하나용: (D, I)"""
+    return search_above_threshold_batch(index, query_vecs[:1], thres, mode=mode, k=k)[0]
+
+
+# 파일별 결과 묶기
+def _group_results(query_norm, D, I, meta, file_token_index, thres2, ngram_index):
     candidate_files = {}
     partial_hits = {}
 
@@ -39,10 +152,22 @@ def search_faiss_with_partial_and_similarity(query_word, model, index, meta, fil
                     "match_type": "부분 포함"
                 }
 
-    D, I = index.search(np.array([query_vec]), index.ntotal)
+    # n-gram 역색인이 있으면 전체 단어 중 부분 포함 결과를 바로 찾음
+    if ngram_index is not None:
+        for idx in ngram_index.partial_matches(query_norm, meta):
+            file_name, word_norm, word_raw = meta[idx]
+            if file_name not in partial_hits:
+                partial_hits[file_name] = {
+                    "file": file_name,
+                    "word": word_raw,
+                    "score": 1.0,
+                    "match_type": "부분 포함"
+                }
 
-    for dist, idx in zip(D[0], I[0]):
-        if dist < thres1:
+    # 점수 내림차순이므로 파일마다 첫 유사도 결과가 최고 점수
+    for dist, idx in zip(D, I):
+        # 증분 업데이트로 삭제된 항목(None)이나 아직 메타에 없는 id는 건너뜀
+        if idx >= len(meta) or meta[idx] is None:
             continue
         file_name, word_norm, word_raw = meta[idx]
         if file_name in partial_hits:
@@ -67,11 +192,66 @@ def search_faiss_with_partial_and_similarity(query_word, model, index, meta, fil
     results = list(partial_hits.values()) + list(candidate_files.values())
     return sorted(results, key=lambda x: x["score"], reverse=True)
 
-# 모델, 인덱스, 메타, 토큰 인덱스 로딩 함수 추가
-def load_components():
-    model = SentenceTransformer(SBERT_PATH, device="cpu")  # cuda도 가능
-    index = faiss.read_index(FAISS_INDEX_PATH)
-    with open(META_PATH, "rb") as f:
-        meta = pickle.load(f)
-    file_token_index = {file: [normalize_token(file)] for file, _, _ in meta}
-    return model, index, meta, file_token_index
\ No newline at end of file
+
+# 검색 함수
+def search_faiss_with_partial_and_similarity(query_word, model, index, meta, file_token_index, thres1=0.4, thres2=0.5, search_mode="topk", ngram_index=None):
+    return search_faiss_batch([query_word], model, index, meta, file_token_index,
+                              thres1, thres2, search_mode, ngram_index)[0]
+
+
+# 여러 질의를 한 번에 검색 (예: 새 업로드 파일의 컬럼명 전체)
+def search_faiss_batch(query_words, model, index, meta, file_token_index, thres1=0.4, thres2=0.5, search_mode="topk", ngram_index=None):
+    query_norms = [normalize_token(q) for q in query_words]
+    if not query_norms:
+        return []
+    query_vecs = encode_queries(model, query_norms)
+    print("🔍 query_vec.shape:", query_vecs.shape)
+    print("🔍 index.d (expected):", index.d)
+
+    hits = search_above_threshold_batch(index, query_vecs, thres1, mode=search_mode)
+    return [
+        _group_results(q, D, I, meta, file_token_index, thres2, ngram_index)
+        for q, (D, I) in zip(query_norms, hits)
+    ]
+
+# 질의 임베딩 모델 로딩 (quantized=True 또는 KURE_QUANTIZED=1이면 int8 양자화 모델)
+def load_sentence_model(quantized=USE_QUANTIZED):
+    if quantized:
+        return load_quantized_sentence_model(SBERT_PATH)
+    return SentenceTransformer(SBERT_PATH, device="cpu")  # cuda도 가능
+
+
+_shared_model = None
+_shared_model_lock = threading.Lock()
+
+
+# 프로세스 안에서 하나만 로딩해 공유 (검색 / SQL 캐시 / 인덱스 증분 업데이트)
+def get_sentence_model():
+    global _shared_model
+    with _shared_model_lock:
+        if _shared_model is None:
+            _shared_model = load_sentence_model()
+        return _shared_model
+
+
+# FAISS 인덱스를 memmap으로 열기 (여러 프로세스가 같은 페이지 캐시를 공유)
+# memmap을 지원하지 않는 인덱스 종류면 일반 로딩
+def read_index_mmap(path=FAISS_INDEX_PATH):
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+# 모델, 인덱스, 메타, 토큰 인덱스 로딩 함수 추가 (model을 주면 모델은 다시 로딩하지 않음)
+def load_components(model=None):
+    model = model or get_sentence_model()
+    index = read_index_mmap(FAISS_INDEX_PATH)
+    meta = load_meta(META_PATH)  # faiss_meta.bin이 있으면 memmap, 없으면 예전 pickle
+    file_token_index = {file: [normalize_token(file)] for file in meta_files(meta)}
+    return model, index, meta, file_token_index
+
+
+# n-gram 역색인 로딩 (없거나 메타와 맞지 않으면 None → 기존 방식으로 부분 포함 확인)
+def load_ngram_components(meta):
+    return load_ngram_index(NGRAM_PATH, meta)
\ No newline at end of file
@@ -0,0 +1,170 @@
+import os
+import stat
+import secrets
+import ipaddress
+import threading
+import argparse
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+from llm_agent.search import (
+    FAISS_INDEX_PATH, load_components, load_ngram_components, search_faiss_batch,
+)
+
+
+# ----------------------------- #
+# 로컬 검색 서비스
+#   모델 / FAISS 인덱스(memmap) / 메타데이터를 한 프로세스가 들고 있고
+#   streamlit 세션들은 로컬 소켓으로 검색만 요청한다 → 로딩 비용과 메모리를 노드당 한 번만 사용
+# 실행: python -m llm_agent.search_service
+# 서비스가 떠 있지 않으면 search() 는 None 을 반환하고, 호출 쪽이 직접 로딩해서 검색한다.
+#
+# 인증 키: 연결은 pickle로 주고받으므로 키를 아는 쪽은 서버에서 코드를 실행할 수 있다.
+#   SEARCH_SERVICE_AUTHKEY 가 있으면 그 값, 없으면 서버가 처음 시작할 때 임의 키를
+#   사용자 설정 폴더(~/.config/hwp-auto/search_service.key, 권한 0600)에 만들고 같은 계정의 클라이언트가 읽는다.
+#   (data/ 는 Flask가 /static 으로 제공하므로 키를 두면 안 됨. SEARCH_SERVICE_KEY_FILE 로 경로 변경 가능)
+#   루프백이 아닌 주소(--host 0.0.0.0 등)는 SEARCH_SERVICE_AUTHKEY 를 직접 지정해야 열 수 있다.
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVED_DIR = os.path.join(BASE_DIR, "data")  # server.py 의 static_folder
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = int(os.getenv("SEARCH_SERVICE_PORT", "6001"))
+CONFIG_DIR = os.path.join(os.getenv("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "hwp-auto")
+AUTHKEY_PATH = os.getenv("SEARCH_SERVICE_KEY_FILE") or os.path.join(CONFIG_DIR, "search_service.key")
+AUTHKEY_ENV = "SEARCH_SERVICE_AUTHKEY"
+
+
+def _read_key_file(path):
+    served = os.path.realpath(SERVED_DIR)
+    if os.path.commonpath([os.path.realpath(path), served]) == served:
+        raise PermissionError(f"인증 키 파일이 웹으로 제공되는 폴더 안에 있음: {path}")
+    st = os.stat(path)
+    if st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise PermissionError(f"인증 키 파일을 다른 사용자가 읽을 수 있음 (chmod 600 필요): {path}")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_authkey(path=AUTHKEY_PATH, create=False):
+    """
+    환경 변수 키 → 키 파일 순으로 사용. create=True(서버)면 키 파일이 없을 때 새로 만든다.
+    반환: 키(bytes), 클라이언트에서 키 파일이 없으면 None
+    """
+    env_key = os.getenv(AUTHKEY_ENV)
+    if env_key:
+        return env_key.encode("utf-8")
+    if not os.path.exists(path):
+        if not create:
+            return None
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:  # 다른 서버 프로세스가 먼저 만든 경우
+            return _read_key_file(path)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_bytes(32))
+        print(f"[INFO] 검색 서비스 인증 키 생성: {path}")
+    return _read_key_file(path)
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class SearchService:
+    """검색 구성요소 보관. 인덱스 파일이 바뀌면 (증분 업데이트) 다시 로딩한다."""
+
+    def __init__(self, faiss_path=FAISS_INDEX_PATH):
+        self.faiss_path = faiss_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.components = None
+
+    def _reload_if_changed(self):
+        mtime = os.path.getmtime(self.faiss_path)
+        if mtime == self._mtime:
+            return
+        model = self.components[0] if self.components else None
+        loaded_model, index, meta, file_token_index = load_components(model=model)
+        self.components = (loaded_model, index, meta, file_token_index, load_ngram_components(meta))
+        self._mtime = mtime
+        print(f"[INFO] 검색 서비스: 인덱스 로딩 완료 (벡터 {index.ntotal}개)")
+
+    def search(self, queries, thres1=0.4, thres2=0.5, search_mode="topk"):
+        with self._lock:
+            self._reload_if_changed()
+            model, index, meta, file_token_index, ngram_index = self.components
+        return search_faiss_batch(queries, model, index, meta, file_token_index,
+                                  thres1, thres2, search_mode, ngram_index)
+
+
+def _handle(conn, service):
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            try:
+                results = service.search(request["queries"], **request.get("options", {}))
+                conn.send({"ok": True, "results": results})
+            except Exception as e:
+                conn.send({"ok": False, "error": str(e)})
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, authkey=None):
+    if not _is_loopback(host) and authkey is None and not os.getenv(AUTHKEY_ENV):
+        raise SystemExit(f"❌ 루프백이 아닌 주소({host})로 열려면 {AUTHKEY_ENV} 를 지정해야 합니다")
+    if authkey is None:
+        authkey = load_authkey(create=True)
+
+    service = SearchService()
+    service.search([])  # 첫 요청 전에 모델/인덱스 로딩
+    with Listener((host, port), authkey=authkey) as listener:
+        print(f"✅ 검색 서비스 시작: {host}:{port}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:  # 인증 실패 등은 해당 연결만 무시
+                print(f"⚠️ 검색 서비스 연결 실패: {e}")
+                continue
+            threading.Thread(target=_handle, args=(conn, service), daemon=True).start()
+
+
+# ----------------------------- #
+# 클라이언트
+# ----------------------------- #
+def search(queries, host=SERVICE_HOST, port=SERVICE_PORT, authkey=None, **options):
+    """
+    queries: 검색어 목록 → 질의별 결과 목록 (search_faiss_batch 와 같은 형식)
+    서비스에 연결할 수 없거나 인증 키가 없으면 None
+    """
+    try:
+        authkey = authkey if authkey is not None else load_authkey()
+        if authkey is None:
+            return None
+        conn = Client((host, port), authkey=authkey)
+    except (ConnectionRefusedError, OSError):
+        return None
+    except AuthenticationError:
+        print("⚠️ 검색 서비스 인증 실패 (서버와 인증 키가 다름) → 직접 검색")
+        return None
+    with conn:
+        conn.send({"queries": list(queries), "options": options})
+        response = conn.recv()
+    if not response["ok"]:
+        raise RuntimeError(f"검색 서비스 오류: {response['error']}")
+    return response["results"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 FAISS 검색 서비스")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,177 @@
+import os
+import re
+import pickle
+import threading
+import numpy as np
+import faiss
+
+from llm_agent.search import get_sentence_model
+from llm_agent.sql_validator import extract_sql_identifiers
+
+
+# ----------------------------- #
+# 설정
+# ----------------------------- #
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SQL_CACHE_INDEX_PATH = os.path.join(BASE_DIR, "data", "faiss", "sql_cache.idx")
+SQL_CACHE_META_PATH = os.path.join(BASE_DIR, "data", "faiss", "sql_cache_meta.pkl")
+SIMILARITY_THRESHOLD = 0.92  # 이 값 이상이면 같은 의도의 질문으로 간주
+TOP_K = 5
+
+
+# ----------------------------- #
+# 스키마 검증
+# ----------------------------- #
+def sql_matches_schema(sql, schema):
+    """
+    캐시된 SQL이 현재 스키마에서도 실행 가능한지 확인.
+
+    - schema: {테이블명: [컬럼명, ...]}
+    - 참조한 테이블이 모두 존재하고, 따옴표 식별자가 테이블명 또는 해당 테이블의 컬럼이면 True
+    """
+    tables, identifiers = extract_sql_identifiers(sql)
+    if not tables or any(t not in schema for t in tables):
+        return False
+
+    known = set(tables)
+    for t in tables:
+        known.update(schema[t])
+    return all(ident in known for ident in identifiers)
+
+
+# ----------------------------- #
+# 값 일치 검사
+#   "전주시 인구" / "군산시 인구", "2022년" / "2023년" 처럼 값만 다른 질문은 임베딩이 거의 같으므로
+#   유사도만으로 재사용하면 WHERE 조건 값이 틀린 SQL이 그대로 실행된다.
+#   → 캐시 항목에 (질문의 숫자, SQL의 문자열 리터럴)을 함께 저장하고
+#     새 질문의 숫자가 같고 리터럴이 모두 새 질문에 들어 있을 때만 재사용
+# ----------------------------- #
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+SQL_LITERAL_PATTERN = re.compile(r"'((?:[^']|'')*)'")
+
+
+def _squash_text(text):
+    return re.sub(r"\s+", "", text).lower()
+
+
+def entry_values(question, queries):
+    """반환: (질문의 숫자 집합, SQL 문자열 리터럴 목록 — LIKE의 %/_ 제거, 공백 제거)"""
+    numbers = frozenset(NUMBER_PATTERN.findall(question))
+    literals = []
+    for sql in queries:
+        for lit in SQL_LITERAL_PATTERN.findall(sql):
+            lit = _squash_text(lit.replace("''", "'").strip("%_"))
+            if lit and lit not in literals:
+                literals.append(lit)
+    return numbers, tuple(literals)
+
+
+def values_match(question, values):
+    """새 질문이 캐시 항목과 같은 숫자를 쓰고, 캐시 SQL의 리터럴 값을 모두 포함하면 True"""
+    numbers, literals = values
+    if frozenset(NUMBER_PATTERN.findall(question)) != numbers:
+        return False
+    squashed = _squash_text(question)
+    return all(lit in squashed for lit in literals)
+
+
+# ----------------------------- #
+# 질문 → SQL 의미 캐시
+# ----------------------------- #
+class SQLSemanticCache:
+    """
+    KURE 임베딩으로 질문을 벡터화하고, 작은 FAISS 인덱스에서 유사 질문을 찾아
+    이전에 성공한 SQL을 재사용한다.
+    """
+
+    def __init__(self, index_path=SQL_CACHE_INDEX_PATH, meta_path=SQL_CACHE_META_PATH,
+                 threshold=SIMILARITY_THRESHOLD, model=None):
+        self.index_path = index_path
+        self.meta_path = meta_path
+        self.threshold = threshold
+        self._model = model
+        self._lock = threading.Lock()
+        self.index = None
+        self.entries = []  # [(질문, [SQL, ...], entry_values 결과), ...] — FAISS 벡터 순서와 동일
+        self._load()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_sentence_model()
+        return self._model
+
+    def _load(self):
+        if os.path.exists(self.index_path) and os.path.exists(self.meta_path):
+            try:
+                self.index = faiss.read_index(self.index_path)
+                with open(self.meta_path, "rb") as f:
+                    # 예전 형식 (질문, SQL 목록) 항목은 값 정보를 계산해 채움
+                    self.entries = [e if len(e) == 3 else (e[0], e[1], entry_values(e[0], e[1]))
+                                    for e in pickle.load(f)]
+                if self.index.ntotal != len(self.entries):
+                    raise ValueError("인덱스와 메타데이터 크기가 일치하지 않습니다.")
+                print(f"[INFO] SQL 캐시 로드: {len(self.entries)}개 질문")
+                return
+            except Exception as e:
+                print(f"⚠️ SQL 캐시 로드 실패, 새로 생성합니다: {e}")
+        self.index = None
+        self.entries = []
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_index = self.index_path + ".tmp"
+        tmp_meta = self.meta_path + ".tmp"
+        faiss.write_index(self.index, tmp_index)
+        with open(tmp_meta, "wb") as f:
+            pickle.dump(self.entries, f)
+        os.replace(tmp_index, self.index_path)
+        os.replace(tmp_meta, self.meta_path)
+
+    def _encode(self, question):
+        vec = self.model.encode(question.strip(), convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray([vec], dtype=np.float32)
+
+    def lookup(self, question, schema):
+        """
+        유사 질문이 threshold 이상이고, 값(숫자/리터럴)이 일치하고, SQL이 현재 스키마에 유효하면 SQL 목록 반환.
+        없으면 None.
+        """
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            query_vec = self._encode(question)
+            D, I = self.index.search(query_vec, min(TOP_K, self.index.ntotal))
+
+        for score, idx in zip(D[0], I[0]):
+            if idx < 0 or score < self.threshold:
+                break
+            cached_question, queries, values = self.entries[idx]
+            if not values_match(question, values):
+                print(f"[INFO] SQL 캐시 유사 질문의 값(지역/연도 등)이 달라 건너뜀: {cached_question}")
+                continue
+            if all(sql_matches_schema(q, schema) for q in queries):
+                print(f"♻️ SQL 캐시 적중 ({score:.3f}): {cached_question}")
+                return list(queries)
+            print(f"⚠️ SQL 캐시 항목이 현재 스키마와 맞지 않아 건너뜀: {cached_question}")
+        return None
+
+    def store(self, question, queries):
+        """실행에 성공한 질문과 SQL 목록을 캐시에 추가"""
+        if not queries:
+            return
+        with self._lock:
+            query_vec = self._encode(question)
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(query_vec.shape[1])
+            else:
+                # 거의 동일한 질문이 이미 있으면 최신 SQL로 교체
+                D, I = self.index.search(query_vec, 1)
+                if I[0][0] >= 0 and D[0][0] >= 0.99 and values_match(question, self.entries[I[0][0]][2]):
+                    self.entries[I[0][0]] = (question, list(queries), entry_values(question, queries))
+                    self._save()
+                    return
+            self.index.add(query_vec)
+            self.entries.append((question, list(queries), entry_values(question, queries)))
+            self._save()
@@ -8,6 +8,10 @@ import pandas as pd
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_community.utilities import SQLDatabase
+from llm_agent.sql_cache import SQLSemanticCache
+from llm_agent.sql_validator import validate_sql
+from llm_agent.index_advisor import optimize_database, log_query
+from llm_agent.table_store import read_table
 
 
 # ----------------------------- #
@@ -28,17 +32,33 @@ MODEL_NAME = "Qwen3-14B"
 include_tables = ["전라북도_대학교_면적", "전라북도_대학교_인원현황"]  # 원하는 테이블명
 
 conn = sqlite3.connect(DB_PATH)
+cursor = conn.cursor()
+cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+existing_tables = {row[0] for row in cursor.fetchall()}
+
+# DB에 없는 테이블만 CSV에서 적재 (이미 있는 테이블은 csv_2_db / 업로드 적재에서 갱신)
+loaded_tables = []
 csv_files = glob.glob(os.path.join(CSV_DIR, "*.csv"))
 for cp in csv_files:
     table_name = os.path.basename(cp)[:-4]
-    if table_name in include_tables:
-        df = pd.read_csv(cp)
+    if table_name in include_tables and table_name not in existing_tables:
+        df = read_table(cp)
         df.to_sql(table_name, conn, if_exists="replace", index=False)
+        loaded_tables.append(table_name)
 
-cursor = conn.cursor()
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
 table_names = [row[0] for row in cursor.fetchall() if row[0] in include_tables]
 
+# 이번에 적재한 테이블만 추천 인덱스 생성 + ANALYZE
+if loaded_tables:
+    optimize_database(conn, loaded_tables)
+
+# 테이블별 컬럼 목록 (SQL 캐시 검증용)
+table_schema = {
+    t: [row[1] for row in cursor.execute(f"PRAGMA table_info('{t}')").fetchall()]
+    for t in table_names
+}
+
 
 # ----------------------------- #
 # LLM 연결
@@ -180,6 +200,40 @@ Output ONLY the final executable SQL query or queries. Any deviation from these
 
 sql_chain = sql_prompt | llm
 
+# 실패한 SQL 한 문장만 다시 고치기 위한 체인
+sql_fix_prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     """You are an expert SQL query fixer for SQLite.
+
+The following SELECT query was generated for the user question but failed validation or execution.
+Fix ONLY this query so that it answers the same part of the question.
+
+Rules:
+1. Use ONLY the exact table names and column names that appear in the schema below.
+2. Wrap table names and column names in double quotes (").
+3. Use exactly ONE table, no JOIN, UNION, WITH or subqueries.
+4. Output exactly ONE SELECT statement ending with ;, with no explanations.
+
+Provided Table Schema:
+{table_info}
+
+User Question:
+{user_question}
+
+Failed Query:
+{failed_sql}
+
+Error:
+{error}"""
+    ),
+    ("human", "Output ONLY the corrected SQL query.")
+])
+
+sql_fix_chain = sql_fix_prompt | llm
+
+# 질문 → SQL 의미 캐시 (유사 질문이면 LLM 호출 생략)
+sql_cache = SQLSemanticCache()
+
 # ----------------------------- #
 # 분석 보고서 체인 (생략된 부분 포함 가능)
 # ----------------------------- #
@@ -473,13 +527,79 @@ def convert_table(lines):
     return df.reset_index(drop=True)
 
 
-def run_sql_analysis(user_query):
-    global table_name, df_table  # streamlit에서 가져가기 위함
-
+def execute_sql_query(sql_raw, user_query=None, max_fix=2):
+    """
+    SQL 한 문장을 검증 → 실행.
+    실패하면 해당 문장만 LLM에 보내 수정 (user_query가 없으면 수정 없이 예외 발생)
+    """
+    for attempt in range(max_fix + 1):
+        sql_checked, error = validate_sql(correct_sql_table_names(sql_raw), table_schema, DB_PATH)
+        print(sql_checked)
+
+        if error is None:
+            try:
+                df = pd.read_sql(sql_checked, db._engine)
+                try:
+                    log_query(sql_checked)
+                except Exception as e:
+                    print(f"⚠️ 쿼리 로그 기록 실패: {e}")
+                if not df.empty:
+                    return sql_checked, df
+                error = "쿼리 실행 결과가 비어있습니다."
+            except Exception as e:
+                error = str(e)
+
+        if user_query is None or attempt >= max_fix:
+            raise ValueError(error)
+
+        print(f"🩹 SQL 수정 요청 {attempt + 1}/{max_fix}: {error}")
+        fix_response = sql_fix_chain.invoke({
+            "table_info": final_table_info,
+            "user_question": user_query,
+            "failed_sql": sql_checked,
+            "error": error
+        })
+        fixed = extract_select_queries(fix_response.content)
+        if not fixed:
+            raise ValueError("수정된 SQL을 찾을 수 없습니다.")
+        sql_raw = fixed[0]
+
+
+def execute_sql_queries(sql_queries, user_query=None):
+    df_result = []
+
+    for i, sql_raw in enumerate(sql_queries):
+        print(f"🎯 Trying SQL Query {i + 1}...")
+        sql_corrected, df = execute_sql_query(sql_raw, user_query)
+
+        df_result.append({
+            "query": sql_corrected,
+            "dataframe": df
+        })
+
+    return df_result
+
+
+def prepare_sql_result(user_query):
+    """질문 → SQL 생성/실행 결과 (캐시 우선, 실패 시 LLM 재생성)"""
     sql_max_retry = 3
     sql_retry = 0
     sql_success = False
 
+    # 캐시된 SQL이 있으면 먼저 실행해 보고, 실패하면 LLM 생성으로 진행
+    try:
+        cached_queries = sql_cache.lookup(user_query, table_schema)
+    except Exception as e:
+        print(f"⚠️ SQL 캐시 조회 실패: {e}")
+        cached_queries = None
+
+    if cached_queries:
+        try:
+            df_result = execute_sql_queries(cached_queries)
+            sql_success = True
+        except Exception as e:
+            print(f"⚠️ 캐시된 SQL 실행 실패, LLM으로 재생성합니다: {e}")
+
     while not sql_success and sql_retry < sql_max_retry:
         try:
             sql_response = sql_chain.invoke({
@@ -490,24 +610,17 @@ def run_sql_analysis(user_query):
 
             # sql_queries = extract_select_queries(sql_response.content.split('</think>')[-1])
             sql_queries = extract_select_queries(sql_response.content)
-            df_result = []
-
-            for i, sql_raw in enumerate(sql_queries):
-                print(f"🎯 Trying SQL Query {i + 1}...")
-                sql_corrected = correct_sql_table_names(sql_raw)
-                print(sql_corrected)
-                df = pd.read_sql(sql_corrected, db._engine)
-
-                if df.empty:
-                    raise ValueError("쿼리 실행 결과가 비어있습니다.")
-
-                df_result.append({
-                    "query": sql_corrected,
-                    "dataframe": df
-                })
+            if not sql_queries:
+                raise ValueError("SELECT 쿼리를 찾을 수 없습니다.")
+            df_result = execute_sql_queries(sql_queries, user_query)
 
             sql_success = True
 
+            try:
+                sql_cache.store(user_query, [r["query"] for r in df_result])
+            except Exception as e:
+                print(f"⚠️ SQL 캐시 저장 실패: {e}")
+
         except Exception as e:
             print(f"⚠️ 에러 발생: {e}")
             sql_retry += 1
@@ -516,31 +629,73 @@ def run_sql_analysis(user_query):
     if not sql_success:
         raise RuntimeError("SQL 쿼리 생성 및 실행에 실패했습니다.")
 
+    return df_result
 
-    response_max_retry = 3
-    response_retry = 0
-    response_success = False
 
-    while not response_success and response_retry < response_max_retry:
+def _split_stable(text):
+    """
+    (정리해도 바뀌지 않는 앞부분, 보류할 끝부분)
+    끝의 공백/물결표는 뒤에 오는 토큰에 따라 normalize_tilde_spacing 결과가 달라지므로 보류
+    """
+    cut = re.search(r"[\s~]*$", text).start()
+    return text[:cut], text[cut:]
+
+
+def stream_response(user_query, df_result):
+    """
+    자연어 응답을 토큰 단위로 반환 (normalize_tilde_spacing 적용).
+    토큰을 하나도 내보내기 전의 오류/빈 응답만 재시도 (이미 보낸 토큰은 되돌릴 수 없음)
+    """
+    response_max_retry = 3
+    for response_retry in range(1, response_max_retry + 1):
+        emitted = False
+        pending = ""
         try:
-            response = response_chain.invoke({"question": user_query, "table": df_result})
-            if not response.content.strip():
+            for chunk in response_chain.stream({"question": user_query, "table": df_result}):
+                pending += chunk.content
+                stable, pending = _split_stable(pending)
+                if stable:
+                    emitted = True
+                    yield normalize_tilde_spacing(stable)
+            if not emitted and not pending.strip():
                 raise ValueError("응답이 비어 있음 (response.content가 없음)")
-            response_success = True
-            response_print = normalize_tilde_spacing(response.content)
-            print(response_print)
+            if pending:
+                yield normalize_tilde_spacing(pending)
+            return
         except Exception as e:
             print(f"⚠️ 자연어 응답 생성 오류: {e}")
-            response_retry += 1
+            if emitted:
+                raise RuntimeError(f"자연어 응답 생성 중 오류: {e}") from e
             print(f"🔁 자연어 응답 재시도 {response_retry}/{response_max_retry}")
 
-    if not response_success:
-        raise RuntimeError("자연어 응답 생성에 실패했습니다.")
-    
+    raise RuntimeError("자연어 응답 생성에 실패했습니다.")
+
+
+def iter_sql_analysis(user_query):
+    """
+    ("token", 텍스트 조각) 을 생성되는 대로 반환하고,
+    마지막에 ("analysis", (응답 전체, 표 DataFrame 목록, 그래프 제목 목록)) 반환
+    """
+    global table_name, df_table  # streamlit에서 가져가기 위함
+
+    df_result = prepare_sql_result(user_query)
+
+    parts = []
+    for token in stream_response(user_query, df_result):
+        parts.append(token)
+        yield "token", token
+    response_print = "".join(parts)
+
     tables = extract_all_markdown_tables(response_print)
     df_table = [df for df in tables]
     table_name = re.findall(r'!\[(.*?)\]', response_print)
 
     print(response_print)
-    
-    return response_print, df_table, table_name
\ No newline at end of file
+
+    yield "analysis", (response_print, df_table, table_name)
+
+
+def run_sql_analysis(user_query):
+    for kind, value in iter_sql_analysis(user_query):
+        if kind == "analysis":
+            return value
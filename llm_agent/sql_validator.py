@@ -0,0 +1,121 @@
+import re
+import difflib
+import sqlite3
+
+
+# ----------------------------- #
+# 식별자 추출 및 보정
+# ----------------------------- #
+def extract_sql_identifiers(sql):
+    """SQL 문에서 FROM 테이블명과 큰따옴표로 감싼 식별자 목록을 추출"""
+    tables = [m[0] or m[1] for m in re.findall(r'FROM\s+"([^"]+)"|FROM\s+([^\s;"]+)', sql, flags=re.IGNORECASE)]
+    # 작은따옴표 문자열 리터럴 안의 큰따옴표는 식별자가 아니므로 먼저 제거
+    without_literals = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    # AS "별칭"은 스키마 식별자가 아니므로 제외
+    aliases = set(re.findall(r'\bAS\s+"([^"]+)"', without_literals, flags=re.IGNORECASE))
+    identifiers = [i for i in re.findall(r'"([^"]+)"', without_literals) if i not in aliases]
+    return tables, identifiers
+
+
+def _squash(name):
+    # 공백/밑줄/구분기호 차이만 있는 식별자를 같은 것으로 보기 위한 키
+    return re.sub(r"[\s·_\-/]", "", name).lower()
+
+
+def closest_identifier(name, candidates):
+    """공백/밑줄/대소문자 차이만 있는 후보 식별자 반환 (없으면 None)"""
+    squashed = _squash(name)
+    for c in candidates:
+        if _squash(c) == squashed:
+            return c
+    return None
+
+
+def similar_identifiers(name, candidates, n=3, cutoff=0.6):
+    """오류 메시지에 보여줄 비슷한 식별자 후보 (자동 교체하지 않음)"""
+    return difflib.get_close_matches(name, candidates, n=n, cutoff=cutoff)
+
+
+def _unresolved_message(name, candidates):
+    similar = similar_identifiers(name, candidates)
+    return f'"{name}" (후보: {", ".join(similar)})' if similar else f'"{name}"'
+
+
+def fix_sql_identifiers(sql, schema):
+    """
+    스키마에 없는 테이블/컬럼 식별자 중 표기 차이(공백/밑줄/대소문자)만 있는 것을 실제 이름으로 교체.
+    그 외 식별자는 비슷한 이름이 있어도 바꾸지 않는다
+    ("2023년_남자" → "2022년_남자" 처럼 다른 컬럼으로 바뀌어 틀린 결과가 조용히 나오지 않도록
+    오류로 돌려 sql_fix_chain 이 후보를 보고 고치게 함).
+
+    - schema: {테이블명: [컬럼명, ...]}
+    - 반환: (보정된 SQL, 보정하지 못한 식별자 설명 목록 — 비슷한 후보 포함)
+    """
+    tables, _ = extract_sql_identifiers(sql)
+    table_names = list(schema.keys())
+
+    # 1. 테이블명 보정
+    fixed_tables = []
+    unresolved = []
+    for t in tables:
+        if t in schema:
+            fixed_tables.append(t)
+            continue
+        corrected = closest_identifier(t, table_names)
+        if corrected:
+            print(f"🔧 테이블명 보정: {t} → {corrected}")
+            sql = sql.replace(f'"{t}"', f'"{corrected}"')
+            fixed_tables.append(corrected)
+        else:
+            unresolved.append(_unresolved_message(t, table_names))
+
+    # 2. 컬럼명 보정 (FROM 절의 테이블 컬럼 기준)
+    columns = []
+    for t in fixed_tables:
+        columns.extend(schema[t])
+    known = set(fixed_tables) | set(columns)
+
+    _, identifiers = extract_sql_identifiers(sql)
+    for ident in dict.fromkeys(identifiers):
+        if ident in known:
+            continue
+        corrected = closest_identifier(ident, columns)
+        if corrected:
+            print(f"🔧 컬럼명 보정: {ident} → {corrected}")
+            sql = sql.replace(f'"{ident}"', f'"{corrected}"')
+        else:
+            unresolved.append(_unresolved_message(ident, columns))
+
+    return sql, unresolved
+
+
+# ----------------------------- #
+# 실행 전 검증
+# ----------------------------- #
+def explain_sql(sql, db_path):
+    """EXPLAIN QUERY PLAN으로 실제 실행 없이 문법/식별자 오류 확인. 오류 메시지 또는 None 반환"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        conn.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}").fetchall()
+        return None
+    except sqlite3.Error as e:
+        return str(e)
+    finally:
+        conn.close()
+
+
+def validate_sql(sql, schema, db_path):
+    """
+    생성된 SQL 한 문장을 검증하고 가능한 범위에서 보정.
+
+    - 반환: (보정된 SQL, 오류 메시지 또는 None)
+    """
+    if not re.match(r"^\s*SELECT\b", sql, flags=re.IGNORECASE):
+        return sql, "SELECT 문이 아닙니다."
+
+    sql, unresolved = fix_sql_identifiers(sql, schema)
+    if unresolved:
+        return sql, f"스키마에 없는 식별자: {', '.join(unresolved)}"
+
+    error = explain_sql(sql, db_path)
+    return sql, error
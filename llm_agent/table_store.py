@@ -0,0 +1,197 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow가 없으면 CSV만 사용
+    pa = None
+    pq = None
+
+
+# ----------------------------- #
+# 전처리 테이블 저장소
+#   data/csv_data/<이름>.csv 옆에 <이름>.parquet을 함께 저장하고,
+#   읽을 때는 최신 parquet이 있으면 memory-map으로 필요한 컬럼만 읽는다.
+# ----------------------------- #
+def parquet_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def has_fresh_parquet(csv_path):
+    """CSV보다 오래되지 않은 parquet이 있으면 True (CSV가 없으면 parquet만으로 판단)"""
+    if pq is None:
+        return False
+    pq_path = parquet_path_for(csv_path)
+    if not os.path.exists(pq_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(pq_path) >= os.path.getmtime(csv_path)
+
+
+def infer_table_dtypes(df):
+    """
+    CSV를 다시 읽었을 때와 같은 타입이 되도록 object 컬럼 정리.
+    - 전부 숫자로 변환되는 컬럼 → 숫자형
+    - 나머지 → 문자열 (결측치는 유지)
+    """
+    # 헤더가 숫자인 경우 등을 위해 컬럼명은 문자열로 통일 (CSV와 동일)
+    out = df.rename(columns=str).copy()
+    for col in out.columns:
+        if out[col].dtype != object:
+            continue
+        converted = pd.to_numeric(out[col], errors="coerce")
+        if converted.notna().sum() == out[col].notna().sum():
+            out[col] = converted
+        else:
+            out[col] = out[col].map(lambda v: v if pd.isna(v) else str(v))
+    return out
+
+
+def write_parquet(df, csv_path):
+    """DataFrame을 CSV 옆 parquet으로 저장 (임시 파일 → 교체)"""
+    if pq is None:
+        return None
+    pq_path = parquet_path_for(csv_path)
+    tmp_path = pq_path + ".tmp"
+    table = pa.Table.from_pandas(infer_table_dtypes(df), preserve_index=False)
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, pq_path)
+    return pq_path
+
+
+def write_table(df, csv_path):
+    """CSV와 parquet을 함께 저장"""
+    df.to_csv(csv_path, index=False)
+    try:
+        write_parquet(df, csv_path)
+    except Exception as e:
+        # 혼합 타입 컬럼 등으로 변환에 실패해도 CSV는 그대로 사용 가능
+        print(f"⚠️ parquet 저장 실패 (CSV만 사용): {csv_path}, 이유: {e}")
+
+
+def read_schema(csv_path):
+    """컬럼별 종류 반환: {컬럼명: "string" | "number" | "other"}"""
+    if has_fresh_parquet(csv_path):
+        schema = pq.read_schema(parquet_path_for(csv_path))
+        kinds = {}
+        for field in schema:
+            if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+                kinds[field.name] = "string"
+            elif pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+                kinds[field.name] = "number"
+            else:
+                kinds[field.name] = "other"
+        return kinds
+
+    df = pd.read_csv(csv_path, nrows=1000)
+    return {
+        col: "string" if df[col].dtype == object
+        else "number" if pd.api.types.is_numeric_dtype(df[col])
+        else "other"
+        for col in df.columns
+    }
+
+
+def read_table(csv_path, columns=None):
+    """테이블 읽기: 최신 parquet이면 memory-map + 컬럼 선택, 아니면 CSV"""
+    if has_fresh_parquet(csv_path):
+        table = pq.read_table(parquet_path_for(csv_path), columns=columns, memory_map=True)
+        return table.to_pandas()
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def read_table_head(csv_path, n=5):
+    """미리보기용: 앞부분 n행만 읽기"""
+    if has_fresh_parquet(csv_path):
+        pf = pq.ParquetFile(parquet_path_for(csv_path), memory_map=True)
+        for batch in pf.iter_batches(batch_size=n):
+            return batch.to_pandas()
+        return pf.schema_arrow.empty_table().to_pandas()
+    return pd.read_csv(csv_path, nrows=n)
+
+
+def iter_table_chunks(csv_path, chunksize):
+    """청크 단위 읽기 (parquet row group 배치 또는 CSV chunksize)"""
+    if has_fresh_parquet(csv_path):
+        pf = pq.ParquetFile(parquet_path_for(csv_path), memory_map=True)
+        for batch in pf.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(csv_path, chunksize=chunksize)
+
+
+class TableChunkWriter:
+    """
+    청크 단위로 CSV(+parquet) 저장 (전체 DataFrame을 메모리에 두지 않음).
+    임시 파일에 이어 쓰고 close() 때 교체, 예외 시 abort()로 임시 파일 삭제.
+
+    parquet 스키마는 첫 청크 기준이며, 뒤 청크의 타입이 맞지 않으면 parquet은 포기하고 CSV만 남긴다.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.rows = 0
+        self._csv_tmp = csv_path + ".tmp"
+        self._pq_tmp = parquet_path_for(csv_path) + ".tmp"
+        self._pq_writer = None
+        self._pq_failed = pq is None
+        self._started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, chunk):
+        chunk.to_csv(self._csv_tmp, mode="a" if self._started else "w", header=not self._started, index=False)
+        self._started = True
+        self.rows += len(chunk)
+        if not self._pq_failed:
+            self._write_parquet(chunk)
+
+    def _write_parquet(self, chunk):
+        try:
+            table = pa.Table.from_pandas(infer_table_dtypes(chunk), preserve_index=False)
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self._pq_tmp, table.schema)
+            else:
+                table = table.cast(self._pq_writer.schema)
+            self._pq_writer.write_table(table)
+        except Exception as e:
+            print(f"⚠️ parquet 저장 중단 (CSV만 사용): {self.csv_path}, 이유: {e}")
+            self._drop_parquet()
+
+    def _drop_parquet(self):
+        self._pq_failed = True
+        if self._pq_writer is not None:
+            try:
+                self._pq_writer.close()
+            except Exception:
+                pass
+            self._pq_writer = None
+        if os.path.exists(self._pq_tmp):
+            os.remove(self._pq_tmp)
+
+    def close(self):
+        """임시 파일 → 실제 경로 (parquet은 CSV 이후에 닫히므로 mtime이 더 최신)"""
+        if not self._started:
+            raise ValueError(f"저장할 청크가 없습니다: {self.csv_path}")
+        os.replace(self._csv_tmp, self.csv_path)
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+            self._pq_writer = None
+            os.replace(self._pq_tmp, parquet_path_for(self.csv_path))
+        elif os.path.exists(parquet_path_for(self.csv_path)):
+            os.remove(parquet_path_for(self.csv_path))  # 예전 parquet이 새 CSV 대신 읽히지 않도록
+
+    def abort(self):
+        self._drop_parquet()
+        if os.path.exists(self._csv_tmp):
+            os.remove(self._csv_tmp)
@@ -0,0 +1,29 @@
+import multiprocessing
+
+
+# ----------------------------- #
+# 작업자 프로세스 시작 방식 (차트 렌더링 풀 / 대량 엑셀 적재 풀)
+#   서버와 적재 작업은 스레드가 여러 개인 상태에서 풀을 만들므로 fork 하면
+#   다른 스레드가 잡고 있던 잠금까지 복사되어 작업자가 멈출 수 있다.
+#   → forkserver: 스레드 없는 별도 프로세스에서 작업자를 fork (없는 플랫폼은 spawn)
+#   forkserver 프로세스는 무거운 라이브러리만 미리 import 해 두고 (작업자 시작이 빠르도록)
+#   __main__ 은 미리 읽지 않는다 (기본값은 __main__ 포함).
+# 주의: spawn / forkserver 작업자는 __main__ 스크립트를 "__mp_main__" 으로 다시 import 하므로
+#   진입 스크립트(server.py)는 import 시점에 DB 적재 / 모델 로딩 같은 일을 하지 않아야 한다.
+# ----------------------------- #
+PRELOAD_MODULES = ["numpy", "pandas", "matplotlib", "openpyxl"]
+
+_context = None
+
+
+def worker_context():
+    """ProcessPoolExecutor(mp_context=...) 에 넘길 시작 방식"""
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            ctx = multiprocessing.get_context("spawn")
+        _context = ctx
+    return _context
@@ -1,14 +1,16 @@
 from flask import Flask, request, jsonify
 import requests
 import os
-from llm_agent.sql_report import run_sql_analysis
 from llm_agent.graph import run_graph_generation
 import matplotlib.pyplot as plt
-from llm_agent.preprocess import preprocess_run
+from llm_agent.bulk_ingest import collect_xlsx
+from llm_agent import ingest_jobs
+from llm_agent import chart_store
+from llm_agent import plot_sandbox
 from flask import send_from_directory
 from flask import Flask, request, Response, stream_with_context
 import json
-import time
+import secrets
 
 app = Flask(__name__, static_url_path="/static", static_folder=os.path.abspath("data"))
 
@@ -16,6 +18,14 @@ app = Flask(__name__, static_url_path="/static", static_folder=os.path.abspath("
 def home():
     return "LLM Flask 서버가 실행 중입니다. /chat으로 POST 요청을 보내세요."
 
+def sse_data(text):
+    """
+    텍스트 조각 → SSE data 이벤트.
+    줄바꿈이 있으면 data: 줄을 나눠 보낸다 (클라이언트가 줄바꿈으로 다시 이어 붙임)
+    """
+    lines = text.replace("\r\n", "\n").split("\n")
+    return "".join(f"data: {line}\n" for line in lines) + "\n"
+
 # ChatBot Code
 @app.route("/chat", methods=["POST"])
 def chat():
@@ -25,14 +35,16 @@ def chat():
     def generate():
         try:
             print(f"[DEBUG-server.py] 사용자 프롬프트 수신: {prompt}")
-            report_text, df_table, table_name = run_sql_analysis(prompt)
+            # 응답 LLM 토큰을 생성되는 대로 전송 → 끝나면 표를 파싱한 분석 결과
+            from llm_agent.sql_report import iter_sql_analysis
+            for kind, value in iter_sql_analysis(prompt):
+                if kind == "token":
+                    yield sse_data(value)
+                else:
+                    report_text, df_table, table_name = value
 
             print(f"[DEBUG-server.py] 보고서 생성 완료, 테이블 수: {len(df_table)}")
 
-            for line in report_text.splitlines(): 
-                yield f"data: {line}\n\n"
-                time.sleep(0.3)
-
             # 🔥 분석 데이터 전송
             encoded_df_table = [df.to_json() for df in df_table]
             yield f"event: analysis\ndata: {json.dumps({'df_table': encoded_df_table, 'table_name': table_name})}\n\n"
@@ -42,7 +54,7 @@ def chat():
             yield "event: end\ndata: done\n\n"
 
         except Exception as e:
-            yield f"data: ❌ 오류: {str(e)}\n\n"
+            yield sse_data(f"\n❌ 오류: {str(e)}")
             yield "event: end\ndata: done\n\n"
 
     return Response(stream_with_context(generate()), content_type="text/event-stream")
@@ -52,6 +64,25 @@ def chat():
 UPLOAD_FOLDER = os.path.abspath("./data/xlsx_data")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+def save_upload(file):
+    """업로드 파일 저장 (임시 파일 → 교체: 같은 파일을 처리 중인 작업이 있어도 읽던 내용은 유지)"""
+    file_path = os.path.join(UPLOAD_FOLDER, os.path.basename(file.filename))
+    tmp_path = f"{file_path}.{secrets.token_hex(4)}.tmp"
+    file.save(tmp_path)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def ingestion_response(job_id, **extra):
+    return jsonify({
+        "ingestion_id": job_id,
+        "status_url": f"/upload/{job_id}",
+        "events_url": f"/upload/{job_id}/events",
+        **extra,
+    }), 202
+
+
+# 파일 저장 후 바로 작업 id 반환 → 전처리 / SQLite 적재 / 검색 인덱스 반영은 백그라운드 작업
 @app.route("/upload", methods=["POST"])
 def upload_file():
     if 'file' not in request.files:
@@ -62,17 +93,69 @@ def upload_file():
         return jsonify({"error" : "선택된 파일이 없습니다."}), 400
 
     try:
-        file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-        file.save(file_path)
+        file_path = save_upload(file)
         print(f"[DEBUG] 파일 저장 위치: {file_path}")
-        preprocess_run(file_path)
-        return jsonify({"message": "파일 업로드 및 저장 성공", "filename": file.filename})
     except Exception as e:
         return jsonify({"error" : f"파일 저장 중 오류 발생 : {str(e)}"}), 500
 
+    job_id = ingest_jobs.submit_job("upload", ingest_jobs.ingest_upload, file_path, filename=file.filename)
+    return ingestion_response(job_id, message="파일 업로드 성공, 처리 중", filename=file.filename)
+
+# 적재 작업 상태 조회
+@app.route("/upload/<job_id>", methods=["GET"])
+def upload_status(job_id):
+    job = ingest_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify(job)
+
+# 적재 작업 진행 상황 (SSE: 상태가 바뀔 때마다 progress 이벤트, 끝나면 end)
+@app.route("/upload/<job_id>/events", methods=["GET"])
+def upload_events(job_id):
+    if ingest_jobs.get_job(job_id) is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+
+    def generate():
+        for job in ingest_jobs.iter_job_updates(job_id):
+            yield f"event: progress\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+        yield "event: end\ndata: done\n\n"
+
+    return Response(stream_with_context(generate()), content_type="text/event-stream")
+
+# 여러 엑셀 파일의 모든 시트를 병렬 전처리 → SQLite 적재 → 검색 인덱스 반영 (백그라운드 작업)
+#   multipart "files" 로 파일을 함께 올리거나, JSON {"files": [업로드 폴더의 파일명, ...]} 로 지정
+#   (둘 다 없으면 업로드 폴더 전체). 진행 상황은 /upload/<id> 와 같은 방식으로 조회
+@app.route("/ingest/bulk", methods=["POST"])
+def ingest_bulk():
+    try:
+        file_paths = [save_upload(file) for file in request.files.getlist("files") if file.filename]
+    except Exception as e:
+        return jsonify({"error" : f"파일 저장 중 오류 발생 : {str(e)}"}), 500
+
+    data = request.get_json(silent=True) or {}
+    file_paths += [os.path.join(UPLOAD_FOLDER, os.path.basename(name)) for name in data.get("files", [])]
+    if not file_paths:
+        file_paths = collect_xlsx([UPLOAD_FOLDER])
+
+    missing = [os.path.basename(fp) for fp in file_paths if not os.path.exists(fp)]
+    if missing:
+        return jsonify({"error": f"파일이 없습니다: {missing}"}), 400
+
+    job_id = ingest_jobs.submit_job("bulk", ingest_jobs.ingest_bulk, file_paths,
+                                    files=[os.path.basename(fp) for fp in file_paths])
+    return ingestion_response(job_id, message=f"엑셀 {len(file_paths)}개 처리 중")
+
+# 그래프는 차트 저장소(data/chart_store)에서 <키>.png 로 제공
 @app.route('/static/graph/<path:filename>')
 def serve_graph(filename):
-    return send_from_directory(os.path.abspath('./graph'), filename)
+    key, ext = os.path.splitext(filename)
+    if ext != ".png" or not chart_store.is_valid_key(key) or chart_store.lookup(key) is None:  # lookup: 사용 시각 갱신 (LRU)
+        return jsonify({"error": "그래프를 찾을 수 없습니다."}), 404
+    return send_from_directory(chart_store.STORE_DIR, filename)
 
 if __name__ == "__main__":
+    # sql_report 는 import 시 DB 적재 / 체인 준비를 하므로 여기서 미리 읽는다
+    # (맨 위에서 import 하면 차트/적재 작업자 프로세스가 server.py를 다시 import 할 때마다 실행됨)
+    import llm_agent.sql_report
+    plot_sandbox.start_sandbox()  # 그래프 코드 작업자를 미리 띄워 첫 요청 지연 제거
     app.run(host="0.0.0.0", port = 5000)
\ No newline at end of file
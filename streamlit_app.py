@@ -6,11 +6,15 @@ import pandas as pd
 from datetime import datetime
 from streamlit_option_menu import option_menu
 from streamlit_modal import Modal
-from llm_agent.search import search_faiss_with_partial_and_similarity, load_components
+from llm_agent.search import search_faiss_with_partial_and_similarity, load_components, load_ngram_components, get_sentence_model, FAISS_INDEX_PATH
+from llm_agent import search_service
 from llm_agent.sql_report import run_sql_analysis
-from llm_agent.graph import run_graph_generation
+from llm_agent.graph import iter_graph_generation
+from llm_agent import chart_store
+from llm_agent.table_store import read_table_head
 from hwpx_report.model_json import generate_structured_report
 from hwpx_report.jbnu_report import *
+from hwpx_report.image_export import export_chart, pic_placement_size, chart_bin_name, link_report_images
 import subprocess
 import shutil
 import sseclient
@@ -86,6 +90,8 @@ with st.sidebar:
         st.session_state.search_results = []
     if "uploaded_files" not in st.session_state:
         st.session_state["uploaded_files"] = []
+    if "pending_uploads" not in st.session_state:
+        st.session_state["pending_uploads"] = {}  # 파일명 → 적재 작업 id
     if "selected_reports" not in st.session_state:
         st.session_state.selected_reports = []
     if "selected_preview_file" not in st.session_state:
@@ -94,14 +100,31 @@ with st.sidebar:
     # 리스트 초기화
     selected_list = []
 
-# 검색 콜백
+# 검색 구성요소: 모든 세션이 하나를 공유 (인덱스 파일이 바뀌면 index_mtime이 달라져 다시 로딩)
+    @st.cache_resource(show_spinner="검색 모델 로딩 중...")
+    def get_search_model():
+        return get_sentence_model()
+
+    @st.cache_resource(max_entries=1, show_spinner="검색 인덱스 로딩 중...")
+    def get_search_components(index_mtime):
+        model, index, meta, file_token_index = load_components(model=get_search_model())
+        return model, index, meta, file_token_index, load_ngram_components(meta)
+
+# 검색 콜백: 검색 서비스(llm_agent/search_service.py)가 떠 있으면 사용, 없으면 직접 로딩
     def on_search():
         keyword = st.session_state["search_input"].strip()
         if keyword:
-            model, index, meta, file_token_index = load_components()
-            results = search_faiss_with_partial_and_similarity(
-                keyword, model, index, meta, file_token_index
-            )
+            results = search_service.search([keyword])
+            if results is not None:
+                results = results[0]
+            else:
+                model, index, meta, file_token_index, ngram_index = get_search_components(
+                    os.path.getmtime(FAISS_INDEX_PATH)
+                )
+                results = search_faiss_with_partial_and_similarity(
+                    keyword, model, index, meta, file_token_index,
+                    ngram_index=ngram_index
+                )
             st.session_state.search_results = [r['file'] for r in results]
         else:
             st.session_state.search_results = []
@@ -144,19 +167,48 @@ with st.sidebar:
 
         if uploaded_files:
             for file in uploaded_files:
-                if file.name not in st.session_state["uploaded_files"]:
+                if file.name not in st.session_state["uploaded_files"] and file.name not in st.session_state["pending_uploads"]:
                     files = {"file": (file.name, file, file.type)}
                     try:
-                        response = requests.post("http://localhost:5000/upload", files=files)
-                        if response.status_code == 200:
-                            st.session_state["uploaded_files"].append(file.name)
-                            if file.name not in st.session_state["selected_reports"]:
-                                st.session_state["selected_reports"].append(file.name)
+                        # 서버는 파일 저장 후 바로 작업 id를 돌려주고 전처리는 백그라운드에서 진행
+                        response = requests.post("http://localhost:5000/upload", files=files, timeout=60)
+                        if response.status_code == 202:
+                            st.session_state["pending_uploads"][file.name] = response.json()["ingestion_id"]
                         else:
                             st.error(f"❌ {file.name} 업로드 실패")
                     except Exception as e:
                         st.error(f"❌ 서버 오류: {e}")
 
+        def show_pending_uploads():
+            """처리 중인 업로드 상태 확인 → 끝난 파일은 목록에 추가"""
+            finished = False
+            for name, ingestion_id in list(st.session_state["pending_uploads"].items()):
+                try:
+                    job = requests.get(f"http://localhost:5000/upload/{ingestion_id}", timeout=5).json()
+                except Exception as e:
+                    st.warning(f"⚠️ {name} 상태 확인 실패: {e}")
+                    continue
+                if job.get("status") == "done":
+                    del st.session_state["pending_uploads"][name]
+                    st.session_state["uploaded_files"].append(name)
+                    if name not in st.session_state["selected_reports"]:
+                        st.session_state["selected_reports"].append(name)
+                    finished = True
+                elif job.get("status") in ("failed", None):  # None: 서버 재시작 등으로 작업을 찾을 수 없음
+                    del st.session_state["pending_uploads"][name]
+                    st.error(f"❌ {name} 처리 실패: {job.get('error')}")
+                else:
+                    st.progress(job.get("progress", 0.0), text=f"⏳ {name}: {job.get('message', '처리 중')}")
+            if finished:
+                st.rerun()  # 보고서 목록에 반영
+
+        if st.session_state["pending_uploads"]:
+            if hasattr(st, "fragment"):
+                st.fragment(run_every=2)(show_pending_uploads)()  # 2초마다 이 부분만 다시 실행
+            else:
+                show_pending_uploads()
+                st.button("🔄 처리 상태 새로고침")
+
     # ===== 보고서 리스트 박스 + 매핑 =====
     csv_dir = "./data/csv_data"
     csv_files = [f for f in os.listdir(csv_dir) if f.endswith(".csv")]
@@ -222,7 +274,7 @@ with st.sidebar:
             if file_path:
                 try:
                     if file_path.endswith(".csv"):
-                        df = pd.read_csv(file_path)
+                        df = read_table_head(file_path, 5)
                     elif file_path.endswith(".xlsx"):
                         df = pd.read_excel(file_path)
                     else:
@@ -326,8 +378,9 @@ if prompt := st.chat_input("질문을 입력하세요"):
                         break
 
                     else:
-                        full_response += event.data + "\n"
-                        message_placeholder.write(full_response)
+                        # 응답 토큰 (줄바꿈은 토큰 안에 포함되어 옴)
+                        full_response += event.data
+                        message_placeholder.markdown(full_response + "▌")
 
                 message_placeholder.markdown(full_response.strip(), unsafe_allow_html=True)
 
@@ -400,16 +453,20 @@ if st.session_state.get("graph_table_name") and not st.session_state.get("graph_
 # ✅ 선택 후 실행: UI 중단되고 여기서 바로 그래프 생성만 실행됨
 if st.session_state.get("graph_choice_made") and st.session_state.get("graph_table_name"):
     with st.spinner("🛠️ 그래프 생성 중입니다..."):
-        time.sleep(0.1)
-        run_graph_generation(
-            st.session_state.latest_df_table,
-            st.session_state.latest_table_names
-        )
-
-    graph_paths = [
-        f"/static/graph/{name}.png"
-        for name in st.session_state.latest_table_names
-    ]
+        # 표마다 끝나는 대로 진행 상황 표시
+        table_names = st.session_state.latest_table_names
+        chart_keys = [None] * len(table_names)
+        progress = st.progress(0.0)
+        for done, (i, key) in enumerate(
+            iter_graph_generation(st.session_state.latest_df_table, table_names), start=1
+        ):
+            chart_keys[i] = key
+            status = "완료" if key else "실패"
+            progress.progress(done / len(table_names), text=f"{table_names[i]} {status} ({done}/{len(table_names)})")
+
+    # 차트 저장소 키 → 서버 주소, 표 이름은 캡션/보고서 파일명으로 사용
+    graph_paths = [f"/static/graph/{key}.png" for key in chart_keys if key]
+    st.session_state.graph_names = [name for name, key in zip(table_names, chart_keys) if key]
     st.session_state.graph_paths = graph_paths
     st.session_state.last_graph_paths = graph_paths
     st.session_state.report_expanded = False
@@ -430,11 +487,12 @@ if (
     ):
     if st.session_state.get("last_graph_paths"):
         cols = st.columns(2)  # ✅ 추가
+        graph_names = st.session_state.get("graph_names", [])
         for i, path in enumerate(st.session_state.last_graph_paths):  # ✅ enumerate 추가
             with cols[i % 2]:  # 2열로 나눠 표시
                 st.image(
                     f"http://localhost:5000{path}",
-                    caption=os.path.basename(path).replace(".png", ""),
+                    caption=graph_names[i] if i < len(graph_names) else os.path.basename(path).replace(".png", ""),
                     width=400
                 )
 
@@ -503,21 +561,28 @@ if (
                     # 한글 보고서 복제
                     copy_folder("hwpx_report/template/JBNU보고서_최종", "hwpx_report/hwpx_file/JBNU보고서_복사본")
 
-                    # ✅ 그래프 파일 복사
-                    graph_dir = os.path.abspath("./graph")  # 실제 파일 저장된 폴더
+                    # ✅ 그래프 파일 복사 (차트 저장소 → BinData/chart_<키>.png)
+                    #   파일 이름은 차트 키로 정하고 표 제목은 캡션으로만 사용 (제목 중복/경로 문자 방지)
                     target_bin_dir = os.path.abspath("./hwpx_report/hwpx_file/JBNU보고서_복사본/BinData")
                     os.makedirs(target_bin_dir, exist_ok=True)
 
-                    for graph_path in st.session_state.get("graph_paths", []):
-                        filename = os.path.basename(graph_path)  # ex: chart1.png
-                        src_path = os.path.join(graph_dir, filename)  # 실제 파일 경로
-                        dst_path = os.path.join(target_bin_dir, filename)
+                    # 양식의 그림 자리 크기에 맞춰 줄이고 PNG/JPEG 중 작은 쪽으로 저장
+                    pic_size = pic_placement_size("hwpx_report/jbnu_note.xml")
+                    bin_names = {}
+                    for graph_path, graph_name in zip(st.session_state.get("graph_paths", []),
+                                                      st.session_state.get("graph_names", [])):
+                        key = os.path.splitext(os.path.basename(graph_path))[0]
+                        src_path = chart_store.store_path(key)  # 실제 파일 경로
 
                         try:
-                            shutil.copy(src_path, dst_path)
-                            print(f"✅ 그래프 복사 완료: {filename}")
+                            dst_path = export_chart(src_path, target_bin_dir, chart_bin_name(key), pic_size)
+                            bin_names.setdefault(graph_name, []).append(dst_path.name)
+                            print(f"✅ 그래프 복사 완료: {graph_name} → {dst_path.name}")
                         except Exception as e:
-                            print(f"❌ 그래프 복사 실패: {filename}, 이유: {e}")
+                            print(f"❌ 그래프 복사 실패: {graph_name}, 이유: {e}")
+
+                    # 보고서 JSON 의 그림 파일명(표 제목)을 BinData 파일 이름으로 연결
+                    link_report_images(output_path, bin_names)
 
 
 